@@ -0,0 +1,105 @@
+"""
+Write and read throughput of the h5 output options of `Collection.save`.
+
+Generates a shape image dataset once, then saves it with each combination of
+chunking, compression and output type, reporting the file size, the write throughput,
+and the read throughput for a full sequential read and for random single object reads
+(the access pattern of a training loop).
+
+    python benchmarks/save_options.py --n_objects 2000 --image_size 128
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import h5py
+import numpy as np
+
+from deepbench.collection import Collection
+
+
+def make_collection(n_objects, image_size):
+    collection = Collection(
+        {
+            "object_type": "shape",
+            "object_name": "ShapeImage",
+            "total_runs": n_objects,
+            "seed": 0,
+            "image_parameters": {
+                "image_shape": [image_size, image_size],
+                "object_noise_level": 0.0,
+            },
+            "object_parameters": {
+                "ellipse": {"object": {}, "instance": {}},
+            },
+        }
+    )
+    collection()
+    return collection
+
+
+def benchmark(collection, save_path, n_random_reads, **save_options):
+    start = time.perf_counter()
+    collection.save(save_path, parameter_format="h5", **save_options)
+    write_time = time.perf_counter() - start
+
+    file_path = f"{save_path}/dataset.h5"
+    size = os.path.getsize(file_path)
+
+    with h5py.File(file_path, "r") as f:
+        start = time.perf_counter()
+        f["data"][:]
+        sequential_time = time.perf_counter() - start
+
+        indices = np.random.default_rng(0).integers(
+            0, f["data"].shape[0], n_random_reads
+        )
+        start = time.perf_counter()
+        for index in indices:
+            f["data"][index]
+        random_time = time.perf_counter() - start
+
+    raw_size = len(collection.objects) * np.prod(np.shape(collection.objects[0])) * 4
+    return {
+        "size (MB)": size / 1e6,
+        "write (MB/s)": raw_size / 1e6 / write_time,
+        "sequential read (MB/s)": raw_size / 1e6 / sequential_time,
+        "random reads (objects/s)": n_random_reads / random_time,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n_objects", type=int, default=2000)
+    parser.add_argument("--image_size", type=int, default=128)
+    parser.add_argument("--n_random_reads", type=int, default=500)
+    args = parser.parse_args()
+
+    options = {
+        "contiguous float32": {"chunks": False},
+        "chunked float32": {},
+        "chunked float32 + lzf": {"compression": "lzf"},
+        "chunked float32 + shuffle + gzip": {"compression": "gzip", "shuffle": True},
+        "chunked float16 + shuffle + gzip": {
+            "compression": "gzip",
+            "shuffle": True,
+            "dtype": "float16",
+        },
+        "chunked uint8 + lzf": {"compression": "lzf", "dtype": "uint8"},
+    }
+
+    collection = make_collection(args.n_objects, args.image_size)
+    columns = None
+    with tempfile.TemporaryDirectory() as directory:
+        for index, (name, save_options) in enumerate(options.items()):
+            results = benchmark(
+                collection, f"{directory}/{index}", args.n_random_reads, **save_options
+            )
+            if columns is None:
+                columns = list(results.keys())
+                print(f"{'':34s}" + "".join(f"{column:>26s}" for column in columns))
+            print(
+                f"{name:34s}"
+                + "".join(f"{results[column]:26.1f}" for column in columns)
+            )
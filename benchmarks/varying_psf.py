@@ -0,0 +1,60 @@
+"""
+Runtime of a PSF varying over the field (overlap-add over a grid of kernels) against a uniform PSF.
+
+Convolves a random image with a uniform Moffat PSF, spatially and by FFT, and with a Moffat PSF
+whose width is interpolated over grids of increasing size. Kernel spectra are cached, so the first
+(cold) run of each configuration also reports the cost of transforming the kernels.
+
+    python benchmarks/varying_psf.py --image_size 2048 --gamma 4
+"""
+import argparse
+import time
+
+import numpy as np
+
+from deepbench.astro_object.psf import convolve_psf, convolve_varying_psf
+
+
+def timed(function, repeats, *args, **kwargs):
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function(*args, **kwargs)
+    return cold, (time.perf_counter() - start) / repeats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--image_size", type=int, default=2048)
+    parser.add_argument("--gamma", type=float, default=4.0)
+    parser.add_argument("--alpha", type=float, default=2.5)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--skip_spatial", action="store_true")
+    args = parser.parse_args()
+
+    image = np.random.default_rng(0).uniform(size=(args.image_size, args.image_size))
+    kernel = {"kernel": "moffat", "alpha": args.alpha}
+
+    runs = {}
+    if not args.skip_spatial:
+        runs["uniform, spatial"] = (convolve_psf, {**kernel, "gamma": args.gamma})
+    runs["uniform, fft"] = (
+        convolve_psf,
+        {**kernel, "method": "fft", "gamma": args.gamma},
+    )
+    for n_nodes in [2, 4, 8]:
+        gamma = (
+            np.linspace(0.5, 1.5, n_nodes**2).reshape(n_nodes, n_nodes) * args.gamma
+        )
+        runs[f"varying, {n_nodes}x{n_nodes} grid"] = (
+            convolve_varying_psf,
+            {**kernel, "gamma": gamma},
+        )
+
+    print(f"{'':28s}{'cold (s)':>12s}{'cached (s)':>12s}")
+    for name, (function, kwargs) in runs.items():
+        cold, cached = timed(function, args.repeats, image, **kwargs)
+        print(f"{name:28s}{cold:12.3f}{cached:12.3f}")
@@ -1,8 +1,13 @@
 from abc import ABC, abstractclassmethod, abstractmethod
+from functools import lru_cache
 from typing import Union, List, Tuple
-from scipy import ndimage
 import numpy as np
 
+from deepbench.astro_object.psf import convolve_psf, psf_radius
+
+# Number of pixels evaluated at once by batched and stamp renders, bounding the memory of their temporary arrays
+_PIXELS_PER_CHUNK = 2**22
+
 
 class AstroObject(ABC):
     """
@@ -35,6 +40,12 @@ class AstroObject(ABC):
 
         self.random_state = np.random.default_rng(seed=seed)
 
+        # Region of the frame the object is rendered on, as (row slice, column slice). None for the full frame.
+        self._bounds = None
+        # Composites that share one PSF turn it off per object and convolve the summed image once
+        self._apply_psf = True
+        self.set_psf()
+
     @abstractmethod
     def create_object(self):
         """
@@ -45,12 +56,28 @@ class AstroObject(ABC):
         """
         raise NotImplementedError()
 
-    def create_psf(self, image_shape, gaussian_blur=0.7) -> np.ndarray:
+    def set_psf(
+        self, kernel: str = "gaussian", method: str = "spatial", **kernel_params
+    ):
+        """
+        Select the Point Spread Function applied to the object. Defaults to a gaussian of width 0.7, convolved spatially.
+
+        Args:
+            kernel (str, optional): "gaussian", "moffat" or "airy", see `deepbench.astro_object.psf.psf_kernel`. Defaults to "gaussian".
+            method (str, optional): "spatial" or "fft" convolution. Defaults to "spatial".
+            kernel_params: Parameters of the kernel.
+
+        Examples:
+            >>> example_obj.set_psf("moffat", method="fft", gamma=2.0, alpha=3.0)
+        """
+        self._psf = {"kernel": kernel, "method": method, **kernel_params}
+
+    def create_psf(self, image_shape, gaussian_blur=None) -> np.ndarray:
         """
         Creates the Point Spread Function to append to the object.
 
         Args:
-            gaussian_blur (float): The level of gaussian blur to be applied.
+            gaussian_blur (float, optional): The level of gaussian blur to be applied. Defaults to None (the PSF selected with `set_psf`).
 
         Returns:
             ndarray: The PSF as an array the same shape as the input.
@@ -59,7 +86,11 @@ class AstroObject(ABC):
             >>> example_obj.create_psf(gaussian_blur=1.2)
             >>> example_obj.create_psf()
         """
-        return ndimage.gaussian_filter(image_shape, sigma=gaussian_blur)
+        if not self._apply_psf:
+            return image_shape
+        if gaussian_blur is not None:
+            return convolve_psf(image_shape, sigma=gaussian_blur)
+        return convolve_psf(image_shape, **self._psf)
 
     # UPDATE THIS METHODS DOCSTRINGS.
 
@@ -80,10 +111,12 @@ class AstroObject(ABC):
         """
         if galaxy:
             return self.random_state.poisson(
-                self._noise_level * 10.0, size=self._image.shape
+                self._noise_level * 10.0, size=self._region_shape()
             )
         else:
-            return self.random_state.poisson(self._noise_level, size=self._image.shape)
+            return self.random_state.poisson(
+                self._noise_level, size=self._region_shape()
+            )
 
     def create_meshgrid(self) -> np.ndarray:
         """
@@ -95,12 +128,108 @@ class AstroObject(ABC):
         Examples:
             >>> example_obj.create_meshgrid()
         """
-        meshgrid = np.meshgrid(
-            np.arange(self._image.shape[0]),
-            np.arange(self._image.shape[1]),
+        if self._bounds is not None:
+            rows, columns = self._bounds
+            return np.meshgrid(
+                np.arange(columns.start, columns.stop),
+                np.arange(rows.start, rows.stop),
+            )
+
+        # Full frame grids only depend on the shape, and are shared by every object
+        return coordinate_grid(self._image.shape[:2])
+
+    def _region_shape(self):
+        if self._bounds is None:
+            return self._image.shape
+        rows, columns = self._bounds
+        return (rows.stop - rows.start, columns.stop - columns.start)
+
+    def stamp_radius(self, truncation=1e-3, **object_params):
+        """
+        Radius around the center of the object outside of which its profile is below `truncation` times its amplitude.
+        Objects without a bounded profile return None, and are rendered on the full frame.
+
+        Args:
+            truncation (float, optional): Fraction of the amplitude the profile is truncated at. Defaults to 1e-3.
+            object_params: Parameters passed to `create_object`.
+
+        Returns:
+            Union[float, None]: Radius in pixels
+        """
+        return None
+
+    def create_unconvolved_object(self, **object_params) -> np.ndarray:
+        """
+        Create the object with its noise, without applying the PSF.
+        As the convolution is linear, a composition of objects sharing one PSF can convolve their sum once with `convolve_psf`.
+
+        Args:
+            object_params: Parameters passed to `create_object`.
+
+        Returns:
+            ndarray: The object before the PSF.
+
+        Examples:
+            >>> image = convolve_psf(example_obj.create_unconvolved_object(center_x=14, center_y=14))
+        """
+        self._apply_psf = False
+        try:
+            return self.create_object(**object_params)
+        finally:
+            self._apply_psf = True
+
+    def create_stamp(self, truncation=1e-3, psf=True, **object_params):
+        """
+        Create the object only on a cutout (stamp) of the frame around its center, including its noise and PSF.
+        The stamp extends `stamp_radius` plus the PSF width from the center, clipped to the frame.
+        Objects without a bounded profile are rendered on the full frame.
+
+        Args:
+            truncation (float, optional): Fraction of the amplitude the profile is truncated at. Defaults to 1e-3.
+            psf (bool, optional): Apply the PSF to the stamp. Without it, the stamp does not extend past `stamp_radius`. Defaults to True.
+            object_params: Parameters passed to `create_object`, must include `center_x` and `center_y` for a bounded stamp.
+
+        Returns:
+            tuple(ndarray, tuple(slice, slice)): The stamp, and the (row, column) slices of the frame it covers.
+
+        Examples:
+            >>> stamp, (rows, columns) = example_obj.create_stamp(center_x=14, center_y=14)
+            >>> image[rows, columns] += stamp
+        """
+        frame_shape = self._image.shape[:2]
+        radius = self.stamp_radius(truncation, **object_params)
+
+        create = self.create_object if psf else self.create_unconvolved_object
+
+        if radius is None:
+            bounds = (slice(0, frame_shape[0]), slice(0, frame_shape[1]))
+            return create(**object_params), bounds
+
+        if psf:
+            kernel_params = {
+                key: value for key, value in self._psf.items() if key != "method"
+            }
+            radius += psf_radius(**kernel_params)
+        center_x, center_y = object_params["center_x"], object_params["center_y"]
+        rows = slice(
+            int(np.clip(np.floor(center_y - radius), 0, frame_shape[0])),
+            int(np.clip(np.ceil(center_y + radius) + 1, 0, frame_shape[0])),
         )
+        columns = slice(
+            int(np.clip(np.floor(center_x - radius), 0, frame_shape[1])),
+            int(np.clip(np.ceil(center_x + radius) + 1, 0, frame_shape[1])),
+        )
+        if rows.stop <= rows.start or columns.stop <= columns.start:
+            # Entirely outside of the frame
+            return np.zeros((0, 0)), (slice(0, 0), slice(0, 0))
+
+        self._bounds = (rows, columns)
+        try:
+            stamp = create(**object_params)
+        finally:
+            self._bounds = None
 
-        return meshgrid
+        return stamp, (rows, columns)
 
     @abstractmethod
     def displayObject(self):
@@ -111,3 +240,58 @@ class AstroObject(ABC):
             NotImplementedError: Raised if not implimented in the child class
         """
         raise NotImplementedError()
+
+
+@lru_cache(maxsize=8)
+def _coordinate_grid(shape):
+    grid = np.meshgrid(np.arange(shape[0]), np.arange(shape[1]))
+    for axis in grid:
+        axis.flags.writeable = False
+    return tuple(grid)
+
+
+@lru_cache(maxsize=8)
+def _polar_grid(shape):
+    x = np.linspace(-shape[0] / 2, shape[0] / 2, shape[0])
+    y = np.linspace(-shape[1] / 2, shape[1] / 2, shape[1])
+    X, Y = np.meshgrid(x, y)
+
+    radius = np.sqrt(X**2 + Y**2)
+    angle = np.arctan2(Y, X) + np.pi
+    radius.flags.writeable = False
+    angle.flags.writeable = False
+    return radius, angle
+
+
+def coordinate_grid(shape: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pixel coordinates (x, y) of a frame, as `np.meshgrid(np.arange(shape[0]), np.arange(shape[1]))`.
+    Grids are cached per shape (for the last 8 shapes) and shared between objects, so they are read-only.
+
+    Args:
+        shape (Tuple[int, int]): Shape of the frame.
+
+    Returns:
+        tuple(ndarray, ndarray): The x and y coordinates of each pixel.
+
+    Examples:
+        >>> x, y = coordinate_grid((28, 28))
+    """
+    return _coordinate_grid(tuple(int(size) for size in shape))
+
+
+def polar_grid(shape: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Distance and angle (between 0 and 2 pi) of each pixel of a frame from its center, on a grid spanning -shape/2 to shape/2.
+    Grids are cached per shape (for the last 8 shapes) and shared between objects, so they are read-only.
+
+    Args:
+        shape (Tuple[int, int]): Shape of the frame.
+
+    Returns:
+        tuple(ndarray, ndarray): The radius and angle of each pixel.
+
+    Examples:
+        >>> radius, angle = polar_grid((28, 28))
+    """
+    return _polar_grid(tuple(int(size) for size in shape))
@@ -1,6 +1,6 @@
 from typing import Union, Tuple
 from deepbench.astro_object.astro_object import AstroObject
-from astropy.modeling.models import Sersic2D
+from deepbench.astro_object.sersic import sersic_bn, sersic_profile
 
 import numpy as np
 from numpy import random
@@ -55,7 +55,8 @@ class GalaxyObject(AstroObject):
 
     def create_Sersic_profile(self, center_x, center_y):
         """
-        Wrapper for https://docs.astropy.org/en/stable/api/astropy.modeling.functional_models.Sersic2D.html
+        Sersic profile of the galaxy, as https://docs.astropy.org/en/stable/api/astropy.modeling.functional_models.Sersic2D.html,
+        evaluated with `deepbench.astro_object.sersic.sersic_profile`.
 
         Args:
             center_x (float): x position of the center of the galaxy
@@ -66,17 +67,30 @@ class GalaxyObject(AstroObject):
         """
 
         x, y = self.create_meshgrid()
-        profile = Sersic2D(
+        return sersic_profile(
+            x,
+            y,
             amplitude=self._amplitude,
-            x_0=center_x,
-            y_0=center_y,
             r_eff=self._radius,
             n=self._n,
+            x_0=center_x,
+            y_0=center_y,
             ellip=self._ellipse,
             theta=self._theta,
         )
 
-        return profile(x, y)
+    def stamp_radius(self, truncation=1e-3, **object_params) -> float:
+        """
+        Radius along the major axis at which the Sersic profile falls to `truncation` times its amplitude (the surface brightness at the effective radius).
+
+        Args:
+            truncation (float, optional): Fraction of the amplitude the profile is truncated at. Defaults to 1e-3.
+
+        Returns:
+            float: Radius in pixels
+        """
+        b_n = sersic_bn(self._n)
+        return self._radius * (1 - np.log(truncation) / b_n) ** self._n
 
     def create_object(self, center_x=5.0, center_y=5.0) -> np.ndarray:
         """
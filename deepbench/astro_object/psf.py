@@ -0,0 +1,384 @@
+import threading
+from collections import OrderedDict, namedtuple
+from functools import lru_cache, wraps
+
+import numpy as np
+from scipy import fft, ndimage
+from scipy.special import j1, jn_zeros
+
+# Default width of the gaussian PSF, and the number of widths `ndimage.gaussian_filter` extends it to
+_PSF_SIGMA = 0.7
+_PSF_TRUNCATE = 4.0
+# Kernel spectra are full frame complex arrays, so their cache is bounded by their total size rather than their number
+_SPECTRUM_CACHE_BYTES = 2**28
+
+_CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "max_bytes", "current_bytes"])
+
+
+def _lru_cache_bytes(max_bytes):
+    """
+    Least recently used cache of the arrays returned by a function, like `lru_cache`,
+    bounded by the total size in bytes of the cached arrays. Arrays larger than `max_bytes` are not cached.
+    """
+
+    def decorator(function):
+        cache = OrderedDict()
+        lock = threading.Lock()
+        stats = {"hits": 0, "misses": 0, "bytes": 0}
+
+        @wraps(function)
+        def cached(*args):
+            with lock:
+                if args in cache:
+                    cache.move_to_end(args)
+                    stats["hits"] += 1
+                    return cache[args]
+                stats["misses"] += 1
+
+            value = function(*args)
+            if value.nbytes > max_bytes:
+                return value
+
+            with lock:
+                if args not in cache:
+                    cache[args] = value
+                    stats["bytes"] += value.nbytes
+                while stats["bytes"] > max_bytes:
+                    _, dropped = cache.popitem(last=False)
+                    stats["bytes"] -= dropped.nbytes
+            return value
+
+        def cache_info():
+            return _CacheInfo(stats["hits"], stats["misses"], max_bytes, stats["bytes"])
+
+        def cache_clear():
+            with lock:
+                cache.clear()
+                stats.update(hits=0, misses=0, bytes=0)
+
+        cached.cache_info = cache_info
+        cached.cache_clear = cache_clear
+        return cached
+
+    return decorator
+
+
+def _gaussian_radius(sigma=_PSF_SIGMA, truncate=_PSF_TRUNCATE):
+    # Same extent as ndimage.gaussian_filter
+    return int(truncate * sigma + 0.5)
+
+
+def _gaussian_kernel(radius, sigma=_PSF_SIGMA, truncate=_PSF_TRUNCATE):
+    x = np.arange(-radius, radius + 1)
+    profile = np.exp(-0.5 * (x / sigma) ** 2)
+    profile /= profile.sum()
+    return np.outer(profile, profile)
+
+
+def _moffat_radius(gamma=1.0, alpha=2.5, truncation=1e-3):
+    return int(np.ceil(gamma * np.sqrt(truncation ** (-1 / alpha) - 1)))
+
+
+def _moffat_kernel(radius, gamma=1.0, alpha=2.5, truncation=1e-3):
+    x, y = np.meshgrid(np.arange(-radius, radius + 1), np.arange(-radius, radius + 1))
+    return (1 + (x**2 + y**2) / gamma**2) ** (-alpha)
+
+
+def _airy_radius(radius=1.0, n_rings=5):
+    # Extends to the `n_rings`th dark ring; `radius` is the first dark ring
+    return int(np.ceil(radius * jn_zeros(1, n_rings)[-1] / jn_zeros(1, 1)[0]))
+
+
+def _airy_kernel(kernel_radius, radius=1.0, n_rings=5):
+    x, y = np.meshgrid(
+        np.arange(-kernel_radius, kernel_radius + 1),
+        np.arange(-kernel_radius, kernel_radius + 1),
+    )
+    r = np.sqrt(x**2 + y**2) * jn_zeros(1, 1)[0] / radius
+    with np.errstate(invalid="ignore", divide="ignore"):
+        profile = (2 * j1(r) / r) ** 2
+    profile[r == 0] = 1.0
+    return profile
+
+
+_KERNELS = {
+    "gaussian": (_gaussian_radius, _gaussian_kernel),
+    "moffat": (_moffat_radius, _moffat_kernel),
+    "airy": (_airy_radius, _airy_kernel),
+}
+
+
+def _kernel_functions(kernel):
+    if kernel not in _KERNELS:
+        raise NotImplementedError(
+            f"PSF kernel {kernel} is not available. "
+            f"Please select a kernel from {list(_KERNELS.keys())}"
+        )
+    return _KERNELS[kernel]
+
+
+def psf_radius(kernel: str = "gaussian", **kernel_params) -> int:
+    """
+    Half width in pixels of a PSF kernel.
+
+    Args:
+        kernel (str, optional): "gaussian" (sigma, truncate), "moffat" (gamma, alpha, truncation) or "airy" (radius, n_rings). Defaults to "gaussian".
+        kernel_params: Parameters of the kernel, see `psf_kernel`.
+
+    Returns:
+        int: Radius of the kernel, which is (2 * radius + 1) pixels wide.
+    """
+    radius, _ = _kernel_functions(kernel)
+    return radius(**kernel_params)
+
+
+def psf_kernel(kernel: str = "gaussian", **kernel_params) -> np.ndarray:
+    """
+    Create a normalized 2D PSF kernel.
+
+    Kernels and their parameters:
+        gaussian: sigma (default 0.7), truncated at `truncate` (default 4.0) sigmas, as `ndimage.gaussian_filter`.
+        moffat: gamma (default 1.0) and alpha (default 2.5), truncated where the profile falls to `truncation` (default 1e-3) of its peak.
+        airy: radius of the first dark ring (default 1.0), truncated at the `n_rings`th dark ring (default 5).
+
+    Args:
+        kernel (str, optional): Name of the kernel. Defaults to "gaussian".
+        kernel_params: Parameters of the kernel.
+
+    Returns:
+        ndarray: The kernel, summing to 1. Kernels are cached, and returned read-only.
+
+    Examples:
+        >>> kernel = psf_kernel("moffat", gamma=2.0, alpha=3.0)
+    """
+    return _cached_kernel(kernel, tuple(sorted(kernel_params.items())))
+
+
+@lru_cache(maxsize=32)
+def _cached_kernel(kernel, kernel_params):
+    radius, create = _kernel_functions(kernel)
+    kernel_params = dict(kernel_params)
+    kernel_array = create(radius(**kernel_params), **kernel_params)
+    kernel_array = kernel_array / kernel_array.sum()
+    kernel_array.flags.writeable = False
+    return kernel_array
+
+
+@_lru_cache_bytes(_SPECTRUM_CACHE_BYTES)
+def _kernel_rfft(shape, kernel, kernel_params):
+    """
+    Real FFT of a kernel centered on the origin of a frame of `shape`, reused for every image of that shape.
+    Cached up to `_SPECTRUM_CACHE_BYTES` of spectra, dropping the least recently used first.
+    """
+    kernel_array = _cached_kernel(kernel, kernel_params)
+    radius = kernel_array.shape[0] // 2
+
+    frame = np.zeros(shape)
+    frame[: kernel_array.shape[0], : kernel_array.shape[1]] = kernel_array
+    frame = np.roll(frame, (-radius, -radius), axis=(0, 1))
+
+    spectrum = fft.rfft2(frame)
+    spectrum.flags.writeable = False
+    return spectrum
+
+
+def convolve_psf(
+    image: np.ndarray,
+    kernel: str = "gaussian",
+    method: str = "spatial",
+    **kernel_params,
+) -> np.ndarray:
+    """
+    Convolve an image with a Point Spread Function, over its first two axes.
+    Edges are reflected, as in `ndimage`, so both methods give the same image.
+
+    The "fft" method pads the image by the kernel radius and multiplies spectra. The spectrum of the kernel is
+    cached per padded image shape and kernel parameters, so convolving many images of one size only transforms the images.
+    The cache holds up to 256 MB of spectra (the spectrum of a 4096x4096 frame takes 134 MB), larger spectra are computed for every call.
+    It is faster than "spatial" for wide kernels.
+
+    Args:
+        image (ndarray): Image to convolve.
+        kernel (str, optional): "gaussian", "moffat" or "airy", see `psf_kernel`. Defaults to "gaussian".
+        method (str, optional): "spatial" (direct convolution) or "fft". Defaults to "spatial".
+        kernel_params: Parameters of the kernel, see `psf_kernel`.
+
+    Returns:
+        ndarray: The convolved image, the same shape as the input.
+
+    Examples:
+        >>> blurred = convolve_psf(image)
+        >>> blurred = convolve_psf(image, kernel="moffat", method="fft", gamma=3.0, alpha=2.5)
+    """
+    params = tuple(sorted(kernel_params.items()))
+    extra_dims = (1,) * (image.ndim - 2)
+
+    if method == "spatial":
+        if kernel == "gaussian":
+            sigma = kernel_params.get("sigma", _PSF_SIGMA)
+            return ndimage.gaussian_filter(
+                image,
+                sigma=(sigma, sigma, *(0 for _ in extra_dims)),
+                truncate=kernel_params.get("truncate", _PSF_TRUNCATE),
+            )
+        kernel_array = _cached_kernel(kernel, params)
+        return ndimage.convolve(
+            image, kernel_array.reshape(kernel_array.shape + extra_dims), mode="reflect"
+        )
+
+    if method == "fft":
+        radius = psf_radius(kernel, **kernel_params)
+        padded = np.pad(
+            image,
+            ((radius, radius), (radius, radius), *((0, 0) for _ in extra_dims)),
+            mode="symmetric",
+        )
+        # The zeros added up to a fast FFT length are never reached from the cropped region
+        shape = tuple(fft.next_fast_len(size, real=True) for size in padded.shape[:2])
+        spectrum = fft.rfft2(padded, s=shape, axes=(0, 1))
+        spectrum *= _kernel_rfft(shape, kernel, params).reshape(
+            spectrum.shape[:2] + extra_dims
+        )
+        convolved = fft.irfft2(spectrum, s=shape, axes=(0, 1))
+        return convolved[
+            radius : radius + image.shape[0], radius : radius + image.shape[1]
+        ]
+
+    raise NotImplementedError(
+        f"PSF method {method} is not available. Please select 'spatial' or 'fft'"
+    )
+
+
+def _cell_weights(size, n_nodes, halo):
+    """
+    Cells between consecutive nodes of `n_nodes` evenly spaced nodes along an axis of `size` pixels, padded by `halo` on both sides.
+    Returns, per cell, the (start, stop) of its pixels in padded coordinates, and the linear interpolation weights of its pixels
+    for each of its two nodes, as (node, weights). Padding pixels take the weights of the nearest pixel of the image.
+    """
+    coordinates = np.clip(np.arange(-halo, size + halo), 0, size - 1)
+    if n_nodes == 1:
+        return [(0, size + 2 * halo, [(0, np.ones(size + 2 * halo))])]
+
+    nodes = np.linspace(0, size - 1, n_nodes)
+    cell = np.minimum(
+        np.searchsorted(nodes, coordinates, side="right") - 1, n_nodes - 2
+    )
+    cells = []
+    for index in range(n_nodes - 1):
+        pixels = np.flatnonzero(cell == index)
+        if pixels.size == 0:
+            continue
+        start, stop = pixels[0], pixels[-1] + 1
+        fraction = (coordinates[start:stop] - nodes[index]) / (
+            nodes[index + 1] - nodes[index]
+        )
+        cells.append((start, stop, [(index, 1 - fraction), (index + 1, fraction)]))
+    return cells
+
+
+def convolve_varying_psf(
+    image: np.ndarray, kernel: str = "gaussian", **kernel_params
+) -> np.ndarray:
+    """
+    Convolve an image with a Point Spread Function that changes across the field, over its first two axes.
+
+    Kernel parameters are either a single value or a 2D grid of values at nodes evenly spaced over the image
+    (the corners of the image are nodes). The image is split into cells between the nodes. Each cell is weighted by the
+    bilinear interpolation weights of its four nodes, and convolved by FFT with the kernel of each node, summing the
+    four products in the frequency domain. The convolved cells are added together (overlap-add), which amounts to the PSF
+    of each pixel being interpolated from its four surrounding nodes. With a single value for every parameter,
+    the result is the same as `convolve_psf(method="fft")`.
+
+    Each pixel is transformed four times, so the cost is about 2 to 3 times one `convolve_psf(method="fft")` of the image
+    once the kernel spectra are cached (1024x1024 and 2048x2048 images, Moffat kernels, grids of 2x2 to 8x8 nodes),
+    and 3 to 5 times on the first call, which also transforms the kernel of every node. See `benchmarks/varying_psf.py`.
+
+    Args:
+        image (ndarray): Image to convolve.
+        kernel (str, optional): "gaussian", "moffat" or "airy", see `psf_kernel`. Defaults to "gaussian".
+        kernel_params: Parameters of the kernel, see `psf_kernel`, as values or (n_rows, n_columns) grids.
+
+    Returns:
+        ndarray: The convolved image, the same shape as the input.
+
+    Examples:
+        >>> sigma = [[0.7, 1.0], [1.5, 2.5]]  # wider PSF towards the bottom right corner
+        >>> blurred = convolve_varying_psf(image, sigma=sigma)
+    """
+    grid_shapes = {
+        np.shape(value) for value in kernel_params.values() if np.ndim(value) > 0
+    }
+    assert len(grid_shapes) <= 1, "All kernel parameter grids must have the same shape."
+    grid_shape = grid_shapes.pop() if grid_shapes else (1, 1)
+    assert len(grid_shape) == 2, "Kernel parameter grids must be 2D."
+
+    node_params = [
+        [
+            {
+                name: np.asarray(value)[row, column].item()
+                if np.ndim(value) > 0
+                else value
+                for name, value in kernel_params.items()
+            }
+            for column in range(grid_shape[1])
+        ]
+        for row in range(grid_shape[0])
+    ]
+    halo = max(psf_radius(kernel, **params) for row in node_params for params in row)
+
+    extra_dims = (1,) * (image.ndim - 2)
+    padded = np.pad(
+        image,
+        ((halo, halo), (halo, halo), *((0, 0) for _ in extra_dims)),
+        mode="symmetric",
+    )
+    # Convolved cells spill up to `halo` pixels past the padded image
+    out = np.zeros(
+        (padded.shape[0] + 2 * halo, padded.shape[1] + 2 * halo, *padded.shape[2:]),
+        dtype=np.result_type(image.dtype, np.float32),
+    )
+
+    row_cells = _cell_weights(image.shape[0], grid_shape[0], halo)
+    column_cells = _cell_weights(image.shape[1], grid_shape[1], halo)
+    for row_start, row_stop, row_nodes in row_cells:
+        for column_start, column_stop, column_nodes in column_cells:
+            cell = padded[row_start:row_stop, column_start:column_stop]
+
+            # Zero padding by the halo on both sides keeps the circular convolution linear
+            convolved_shape = (cell.shape[0] + 2 * halo, cell.shape[1] + 2 * halo)
+            shape = tuple(
+                fft.next_fast_len(size, real=True) for size in convolved_shape
+            )
+
+            # Spectra of the cell weighted for each of its nodes, times the kernel of the node,
+            # are summed so the cell is transformed back once. Weights are separable, so the transform
+            # along the rows is shared by the nodes of a column, and the row weights are applied before the second axis.
+            spectrum = 0
+            for column, column_weight in column_nodes:
+                row_spectra = fft.rfft(
+                    cell * column_weight.reshape((1, -1) + extra_dims),
+                    n=shape[1],
+                    axis=1,
+                )
+                for row, row_weight in row_nodes:
+                    node_spectrum = fft.fft(
+                        row_spectra * row_weight.reshape((-1, 1) + extra_dims),
+                        n=shape[0],
+                        axis=0,
+                    )
+                    node_spectrum *= _kernel_rfft(
+                        shape, kernel, tuple(sorted(node_params[row][column].items()))
+                    ).reshape(node_spectrum.shape[:2] + extra_dims)
+                    spectrum += node_spectrum
+            convolved = fft.irfft2(spectrum, s=shape, axes=(0, 1))
+            convolved = np.roll(convolved, (halo, halo), axis=(0, 1))
+
+            out_rows = slice(row_start, row_stop + 2 * halo)
+            out_columns = slice(column_start, column_stop + 2 * halo)
+            out[out_rows, out_columns] += convolved[
+                : convolved_shape[0], : convolved_shape[1]
+            ]
+
+    return out[
+        2 * halo : 2 * halo + image.shape[0], 2 * halo : 2 * halo + image.shape[1]
+    ]
@@ -0,0 +1,159 @@
+from functools import lru_cache
+from typing import Tuple, Union
+
+import numpy as np
+from scipy.special import gammaincinv
+
+from deepbench.astro_object.astro_object import _PIXELS_PER_CHUNK
+
+
+@lru_cache(maxsize=1024)
+def _sersic_bn(n):
+    return float(gammaincinv(2.0 * n, 0.5))
+
+
+def sersic_bn(n: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
+    """
+    The Sersic b_n constant, for which the effective radius encloses half of the light: gammaincinv(2n, 0.5).
+    Values are memoized per index, so a batch of galaxies only computes each distinct index once.
+
+    Args:
+        n (Union[float, np.ndarray]): Sersic index, or array of indices.
+
+    Returns:
+        Union[float, np.ndarray]: b_n of each index.
+
+    Examples:
+        >>> sersic_bn(4.0)
+        7.669249442500805
+    """
+    if np.ndim(n) == 0:
+        return _sersic_bn(float(n))
+    indices, inverse = np.unique(np.asarray(n, dtype=float), return_inverse=True)
+    return np.array([_sersic_bn(index) for index in indices])[inverse].reshape(
+        np.shape(n)
+    )
+
+
+def sersic_profile(
+    x: np.ndarray,
+    y: np.ndarray,
+    amplitude: float = 1.0,
+    r_eff: float = 25.0,
+    n: float = 1.0,
+    x_0: float = 0.0,
+    y_0: float = 0.0,
+    ellip: float = 0.0,
+    theta: float = 0.0,
+) -> np.ndarray:
+    """
+    Evaluate a 2D Sersic profile at coordinates (x, y), with the same parameters and result as astropy's `Sersic2D`,
+    without constructing a model.
+
+    Args:
+        x (np.ndarray): x coordinates.
+        y (np.ndarray): y coordinates.
+        amplitude (float, optional): Surface brightness at the effective radius. Defaults to 1.0.
+        r_eff (float, optional): Effective (half-light) radius along the major axis. Defaults to 25.0.
+        n (float, optional): Sersic index. Defaults to 1.0.
+        x_0 (float, optional): x position of the center. Defaults to 0.0.
+        y_0 (float, optional): y position of the center. Defaults to 0.0.
+        ellip (float, optional): Ellipticity. Defaults to 0.0.
+        theta (float, optional): Rotation of the major axis from the x axis, in radians. Defaults to 0.0.
+
+    Returns:
+        np.ndarray: The profile at each coordinate.
+
+    Examples:
+        >>> x, y = np.meshgrid(np.arange(28), np.arange(28))
+        >>> profile = sersic_profile(x, y, r_eff=5.0, n=4.0, x_0=14.0, y_0=14.0, ellip=0.3)
+    """
+    cos_theta, sin_theta = np.cos(theta), np.sin(theta)
+    x_maj = (x - x_0) * cos_theta + (y - y_0) * sin_theta
+    x_min = -(x - x_0) * sin_theta + (y - y_0) * cos_theta
+
+    b = (1 - ellip) * r_eff
+    z_squared = (x_maj / r_eff) ** 2 + (x_min / b) ** 2
+    return amplitude * np.exp(-sersic_bn(n) * (z_squared ** (0.5 / n) - 1.0))
+
+
+def sersic_batch(
+    image_shape: Tuple[int, int],
+    center_x: Union[float, np.ndarray],
+    center_y: Union[float, np.ndarray],
+    amplitude: Union[float, np.ndarray] = 1.0,
+    r_eff: Union[float, np.ndarray] = 25.0,
+    n: Union[float, np.ndarray] = 1.0,
+    ellip: Union[float, np.ndarray] = 0.0,
+    theta: Union[float, np.ndarray] = 0.0,
+    out: np.ndarray = None,
+    dtype: str = "float64",
+) -> np.ndarray:
+    """
+    Evaluate the Sersic profiles of a batch of galaxies, one per image, on frames of `image_shape`.
+    Parameters are arrays with one value per galaxy, or single values shared by all galaxies.
+    Rows of the output are y, and columns are x, as for `sersic_profile` on `np.meshgrid(np.arange(width), np.arange(height))`.
+
+    Args:
+        image_shape (Tuple[int, int]): (height, width) of each image.
+        center_x (Union[float, np.ndarray]): x position of the center of each galaxy.
+        center_y (Union[float, np.ndarray]): y position of the center of each galaxy.
+        amplitude (Union[float, np.ndarray], optional): Surface brightness at the effective radius. Defaults to 1.0.
+        r_eff (Union[float, np.ndarray], optional): Effective radius. Defaults to 25.0.
+        n (Union[float, np.ndarray], optional): Sersic index. Defaults to 1.0.
+        ellip (Union[float, np.ndarray], optional): Ellipticity. Defaults to 0.0.
+        theta (Union[float, np.ndarray], optional): Rotation in radians. Defaults to 0.0.
+        out (np.ndarray, optional): (N, height, width) buffer the profiles are written to. Defaults to None (a new array).
+        dtype (str, optional): Data type of a new output. Defaults to "float64".
+
+    Returns:
+        np.ndarray: (N, height, width) profiles.
+
+    Examples:
+        >>> galaxies = sersic_batch((64, 64), center_x=[20, 32], center_y=[30, 32], r_eff=[5, 8], n=[1, 4])
+    """
+    center_x, center_y, amplitude, r_eff, n, ellip, theta = (
+        np.ravel(value).astype(float)
+        for value in np.broadcast_arrays(
+            center_x, center_y, amplitude, r_eff, n, ellip, theta
+        )
+    )
+    height, width = image_shape[:2]
+    shape = (center_x.size, height, width)
+    if out is None:
+        out = np.empty(shape, dtype=dtype)
+    assert out.shape == shape, f"Output buffer must be of shape {shape}."
+
+    bn = sersic_bn(n)
+    cos_theta, sin_theta = np.cos(theta), np.sin(theta)
+    minor_axis = (1 - ellip) * r_eff
+    rows, columns = np.arange(height), np.arange(width)
+    per_galaxy = (slice(None), np.newaxis, np.newaxis)
+
+    chunk_size = max(1, _PIXELS_PER_CHUNK // (height * width))
+    for start in range(0, center_x.size, chunk_size):
+        chunk = slice(start, start + chunk_size)
+        dx = columns - center_x[chunk, np.newaxis]
+        dy = rows - center_y[chunk, np.newaxis]
+
+        # Rotated coordinates are separable sums of per-row and per-column terms
+        x_maj = (dx * cos_theta[chunk, np.newaxis])[:, np.newaxis, :] + (
+            dy * sin_theta[chunk, np.newaxis]
+        )[:, :, np.newaxis]
+        x_min = (dy * cos_theta[chunk, np.newaxis])[:, :, np.newaxis] - (
+            dx * sin_theta[chunk, np.newaxis]
+        )[:, np.newaxis, :]
+
+        x_maj /= r_eff[chunk][per_galaxy]
+        x_min /= minor_axis[chunk][per_galaxy]
+        z = np.square(x_maj, out=x_maj)
+        z += np.square(x_min, out=x_min)
+
+        profile = np.power(z, (0.5 / n[chunk])[per_galaxy], out=z)
+        profile -= 1.0
+        profile *= -bn[chunk][per_galaxy]
+        profile = np.exp(profile, out=profile)
+        profile *= amplitude[chunk][per_galaxy]
+        out[chunk] = profile
+
+    return out
@@ -1,5 +1,7 @@
+from functools import lru_cache
 from typing import Tuple, Union
 from deepbench.astro_object.galaxy_object import GalaxyObject
+from deepbench.astro_object.astro_object import polar_grid
 import numpy as np
 
 
@@ -15,6 +17,12 @@ class SpiralGalaxyObject(GalaxyObject):
         arm_thickness (float, optional): Width of each arm of the spiral. Defaults to 1.0.
         winding_number (int, optional): number of arms. Defaults to 2.
         spiral_pitch (float, optional): Severity of the spiral, the pitch angle. Defaults to 0.2.
+        placement (str, optional): "frame" renders the spiral at the center of the frame, whatever the requested center.
+            "shift" renders it once per morphology on a cached template, and moves it to the requested center
+            with an integer shift and a sub-pixel (bilinear) shift. At the center of the frame, both are the same.
+            Centers outside of the frame extend the template by whole frames, which grows with their distance to the frame.
+            "center" evaluates the spiral around the requested center on the pixels of the frame, spaced by one as for Sersic galaxies,
+            so the spiral of a larger frame can be rendered on any part of it. Defaults to "frame".
                 seed (Union[float, list[float]], optional): Seed to set the random state for noise in the object. Initialized at the init of the class. Default None.
 
     Examples:
@@ -33,10 +41,12 @@ class SpiralGalaxyObject(GalaxyObject):
         winding_number: int = 2,
         spiral_pitch: float = 0.2,
         seed: Union[int, None] = None,
-        **kwargs
+        placement: str = "frame",
+        **kwargs,
     ):
         self.pitch_angle = spiral_pitch
         self.winding_number = winding_number
+        self.placement = placement
 
         super().__init__(
             image_dimensions=image_dimensions,
@@ -64,34 +74,73 @@ class SpiralGalaxyObject(GalaxyObject):
             spiral profile (numpy array): Profile representing the spiral galaxy
         """
 
-        # Define the grid
-        side_length = self._image.shape
-        x = np.linspace(-side_length[0] / 2, side_length[0] / 2, side_length[0])
-        y = np.linspace(-side_length[1] / 2, side_length[1] / 2, side_length[1])
-        X, Y = np.meshgrid(x, y)
-
-        # Calculate the distance from the center
-        R = np.sqrt(X**2 + Y**2)  # + np.sqrt(center_x**2 + center_y**2)
-
-        # Calculate the angle from the x-axis
-        theta = np.arctan2(Y, X) + np.pi
-
-        # Create the spiral pattern
-        spiral = np.zeros_like(R)
-        for arm in range(self.winding_number):
-            arm_angle = 2 * np.pi * arm / self.winding_number
-            # Calculate logarithmic spiral
-            r_spiral = ((self._radius * 2) / (2 * np.pi)) * np.exp(
-                (theta - arm_angle) / np.tan(self.pitch_angle)
+        if self.placement == "frame":
+            # Distance from the center, and angle from the x-axis, of each pixel
+            R, theta = polar_grid(self._image.shape)
+            spiral = _spiral_arms(
+                R, theta, self._radius, self.pitch_angle, self.winding_number, self._n
+            )
+        elif self.placement == "shift":
+            spiral = self._shift_template(center_x, center_y)
+        elif self.placement == "center":
+            # Rows and columns of the frame, or of its rendered region
+            rows, columns = self._bounds or tuple(
+                slice(0, size) for size in self._image.shape[:2]
+            )
+            Y, X = np.ogrid[rows, columns]
+            X, Y = X - center_x, Y - center_y
+            R = np.sqrt(X**2 + Y**2)
+            theta = np.arctan2(Y, X) + np.pi
+            spiral = _spiral_arms(
+                R, theta, self._radius, self.pitch_angle, self.winding_number, self._n
+            )
+        else:
+            raise NotImplementedError(
+                f"Placement {self.placement} is not available. Please select 'frame', 'shift' or 'center'"
             )
 
-            # Calculate distance from each point to the spiral arm
-            distance = np.abs(R - r_spiral)
+        return self._amplitude * spiral
 
-            # Add arm intensity to the spiral pattern
-            spiral += self._amplitude * np.exp(-(distance**2) / (2 * self._n**2))
+    def _shift_template(self, center_x, center_y):
+        """
+        Cut the frame out of the cached template, centered at (center_x, center_y).
+        Centers outside of the frame use a template extended by as many frames as needed to reach them.
+        """
+        shape = tuple(int(size) for size in self._image.shape[:2])
+        # Whole frames the center is outside of the frame by, along either axis (rows are y, as in `polar_grid`)
+        margin = max(
+            int(np.ceil(max(-center, center - (size - 1), 0) / size))
+            for center, size in [(center_y, shape[1]), (center_x, shape[0])]
+        )
+        template = _spiral_template(
+            shape,
+            float(self._radius),
+            float(self.pitch_angle),
+            int(self.winding_number),
+            float(self._n),
+            margin,
+        )
+        # The template spans the frame and `margin` frames on each side, twice over, centered on the pixel (middle_row, middle_column)
+        height, width = (np.array(template.shape) - 1) // (2 * (1 + margin))
+        middle_row, middle_column = (1 + margin) * height, (1 + margin) * width
+        row, column = int(np.floor(center_y)), int(np.floor(center_x))
+        row_fraction, column_fraction = center_y - row, center_x - column
+
+        # Pixel (i, j) of the frame is the template at (middle_row + i - center_y, middle_column + j - center_x),
+        # interpolated between its two neighbouring template pixels along each axis
+        top, left = middle_row - row - 1, middle_column - column - 1
+        window = template[top : top + height + 1, left : left + width + 1]
+        rows = (1 - row_fraction) * window[1:] + row_fraction * window[:-1]
+        return (1 - column_fraction) * rows[:, 1:] + column_fraction * rows[:, :-1]
+
+    def stamp_radius(self, truncation=1e-3, **object_params):
+        """
+        The spiral arms are not bounded, so spiral galaxies are always rendered on the full frame.
 
-        return spiral
+        Returns:
+            None
+        """
+        return None
 
     def create_object(self, center_x, center_y) -> np.ndarray:
         """
@@ -129,3 +178,54 @@ class SpiralGalaxyObject(GalaxyObject):
         """
 
         raise NotImplementedError()
+
+
+def _spiral_arms(R, theta, radius, pitch_angle, winding_number, arm_thickness):
+    """
+    Sum of the unit amplitude logarithmic spiral arms at distance `R` and angle `theta` from the center, evaluated for all arms at once.
+    """
+    arm_angle = 2 * np.pi * np.arange(winding_number) / winding_number
+    # exp((theta - arm_angle) / tan(pitch)) is a per arm factor of one frame of exp(theta / tan(pitch))
+    r_spiral = ((radius * 2) / (2 * np.pi)) * np.exp(theta / np.tan(pitch_angle))
+    r_spiral = (
+        r_spiral * np.exp(-arm_angle / np.tan(pitch_angle))[:, np.newaxis, np.newaxis]
+    )
+
+    # Distance from each point to each spiral arm
+    distance = np.subtract(R, r_spiral, out=r_spiral)
+    profile = np.square(distance, out=distance)
+    profile *= -1 / (2 * arm_thickness**2)
+    profile = np.exp(profile, out=profile)
+    return profile.sum(axis=0)
+
+
+@lru_cache(maxsize=32)
+def _spiral_template(
+    shape, radius, pitch_angle, winding_number, arm_thickness, margin=0
+):
+    """
+    Unit amplitude spiral on a grid spanning twice `shape` extended by `margin` frames on each side, centered on its middle pixel,
+    so any center in the frame, or up to `margin` frames outside of it, can be cut out of it. Cached per morphology and read-only.
+    Pixels are spaced as in `polar_grid` (size / (size - 1) per pixel), so a spiral cut out at the
+    center of the frame is the one of "frame" placement.
+    """
+    x = np.arange(
+        -(1 + margin) * shape[0], (1 + margin) * shape[0] + 1
+    ) * _polar_spacing(shape[0])
+    y = np.arange(
+        -(1 + margin) * shape[1], (1 + margin) * shape[1] + 1
+    ) * _polar_spacing(shape[1])
+    X, Y = np.meshgrid(x, y)
+    R = np.sqrt(X**2 + Y**2)
+    theta = np.arctan2(Y, X) + np.pi
+
+    template = _spiral_arms(
+        R, theta, radius, pitch_angle, winding_number, arm_thickness
+    )
+    template.flags.writeable = False
+    return template
+
+
+def _polar_spacing(size):
+    # Spacing of np.linspace(-size / 2, size / 2, size), the grid of `polar_grid`
+    return size / (size - 1) if size > 1 else 1.0
@@ -0,0 +1,262 @@
+from typing import Union, List, Tuple
+
+import numpy as np
+
+from deepbench.astro_object.astro_object import AstroObject, _PIXELS_PER_CHUNK
+
+
+class StarFieldObject(AstroObject):
+    """
+    Create a field of many stars at once.
+
+    Each star is a Moffat profile, as in `StarObject`, evaluated only on a square stamp around its center,
+    out to where it falls to `truncation` times its amplitude. Stars are rendered together with vectorized
+    index arithmetic, and scattered into the image with `np.bincount`, so fields of millions of stars stay cheap.
+    Noise and the PSF are applied once to the whole field.
+
+    Args:
+        image_dimensions (Union[Tuple[int, int], Tuple[float, float]]): The dimension(s) of the object to be produced.
+        noise_level (Union[float, list[float]]): The Poisson noise level (lambda, the  expected seperation) to be applied to the field.
+        radius (Union[int, float]): Default radius (Moffat gamma) of the stars.
+        amplitude (Union[int, float]): Default amplitude (brightness) of the stars.
+        seed (Union[float, list[float]], optional): Seed to set the random state for noise in the object. Initialized at the init of the class. Default None.
+
+    Examples:
+
+        >>> field = StarFieldObject(image_dimensions=(8192, 8192))
+        >>> centers = np.random.uniform(0, 8192, size=(2, 1_000_000))
+        >>> image = field.create_object(center_x=centers[0], center_y=centers[1], alpha=3.0)
+    """
+
+    def __init__(
+        self,
+        image_dimensions: Union[int, float, List[int], List[float]],
+        noise_level: Union[float, List[float]] = 0.0,
+        radius: Union[int, float] = 1.0,
+        amplitude: Union[int, float] = 1.0,
+        seed: Union[int, None] = None,
+    ) -> None:
+
+        super().__init__(
+            image_dimensions=image_dimensions,
+            radius=radius,
+            amplitude=amplitude,
+            noise_level=noise_level,
+            seed=seed,
+        )
+
+    def create_star_field(
+        self,
+        center_x: Union[float, List[float]],
+        center_y: Union[float, List[float]],
+        amplitude: Union[float, List[float], None] = None,
+        radius: Union[float, List[float], None] = None,
+        alpha: Union[float, List[float]] = 1.0,
+        truncation: float = 1e-3,
+        out: np.ndarray = None,
+    ) -> np.ndarray:
+        """
+        Sum the Moffat profiles of all stars, each evaluated on its own stamp.
+
+        Args:
+            center_x (Union[float, list[float]]): The x-axis placement of each star.
+            center_y (Union[float, list[float]]): The y-axis placement of each star.
+            amplitude (Union[float, list[float]], optional): Amplitude of each star. Defaults to None (the amplitude of the field).
+            radius (Union[float, list[float]], optional): Moffat gamma of each star. Defaults to None (the radius of the field).
+            alpha (Union[float, list[float]], optional): Moffat alpha of each star. Defaults to 1.0.
+            truncation (float, optional): Fraction of the amplitude each profile is truncated at. Defaults to 1e-3.
+            out (ndarray, optional): Image of the shape of the field the stars are added to. Defaults to None (a new image).
+
+        Returns:
+            ndarray: Two dimensional image of the stars.
+
+        Examples:
+
+            >>> profile = field.create_star_field(center_x=[3.0, 10.5], center_y=[4.0, 8.0], radius=[1.0, 2.0])
+        """
+        amplitude = self._amplitude if amplitude is None else amplitude
+        radius = self._radius if radius is None else radius
+        center_x, center_y, amplitude, radius, alpha = (
+            np.ravel(value).astype(float)
+            for value in np.broadcast_arrays(
+                center_x, center_y, amplitude, radius, alpha
+            )
+        )
+
+        height, width = self._image.shape[:2]
+        image = np.zeros((height, width)) if out is None else out
+        if center_x.size == 0:
+            return image
+
+        stamp_radius = np.ceil(radius * np.sqrt(truncation ** (-1 / alpha) - 1))
+        # Rounded half up rather than to even, so stamps move with the stars when frames are offset by whole pixels
+        row = np.floor(center_y + 0.5).astype(np.int64)
+        column = np.floor(center_x + 0.5).astype(np.int64)
+
+        # Stars entirely outside of the frame are never drawn,
+        # and stars with stamps entirely inside of it skip the clipping
+        visible = (
+            (row + stamp_radius >= 0)
+            & (row - stamp_radius < height)
+            & (column + stamp_radius >= 0)
+            & (column - stamp_radius < width)
+        )
+        interior = (
+            (row - stamp_radius >= 0)
+            & (row + stamp_radius < height)
+            & (column - stamp_radius >= 0)
+            & (column + stamp_radius < width)
+        )
+
+        # Stars are rendered in row order, in chunks bounded both in stamp pixels
+        # and in the band of rows they are scattered into
+        stars = np.flatnonzero(visible)
+        stars = stars[np.argsort(row[stars], kind="stable")]
+        stamp_pixels = np.cumsum((2 * stamp_radius[stars] + 1) ** 2)
+        band_rows = max(1, _PIXELS_PER_CHUNK // width)
+
+        start = 0
+        while start < stars.size:
+            previous_pixels = stamp_pixels[start - 1] if start > 0 else 0
+            stop = min(
+                np.searchsorted(
+                    stamp_pixels, previous_pixels + _PIXELS_PER_CHUNK, side="right"
+                ),
+                np.searchsorted(row[stars], row[stars[start]] + band_rows),
+            )
+            chunk = stars[start : max(stop, start + 1)]
+            start = max(stop, start + 1)
+
+            first_row = max(row[chunk[0]] - int(stamp_radius[chunk].max()), 0)
+            last_row = min(row[chunk[-1]] + int(stamp_radius[chunk].max()), height - 1)
+
+            indices, profiles = [], []
+            # Stars sharing a stamp size are evaluated together
+            for half_width in np.unique(stamp_radius[chunk]).astype(np.int64):
+                for clip in [False, True]:
+                    group = chunk[
+                        (stamp_radius[chunk] == half_width) & (interior[chunk] != clip)
+                    ]
+                    if group.size == 0:
+                        continue
+                    offsets = np.arange(-half_width, half_width + 1)
+                    group_indices, group_profile = self._stamp_pixels(
+                        row[group, np.newaxis] + offsets,
+                        column[group, np.newaxis] + offsets,
+                        center_x[group],
+                        center_y[group],
+                        amplitude[group],
+                        radius[group],
+                        alpha[group],
+                        first_row,
+                        (height, width),
+                        clip,
+                    )
+                    indices.append(group_indices)
+                    profiles.append(group_profile)
+
+            # Scatter into the band of rows the chunk covers
+            band = np.bincount(
+                np.concatenate(indices),
+                weights=np.concatenate(profiles),
+                minlength=(last_row - first_row + 1) * width,
+            )
+            image[first_row : last_row + 1] += band.reshape(-1, width)
+
+        return image
+
+    @staticmethod
+    def _stamp_pixels(
+        rows,
+        columns,
+        center_x,
+        center_y,
+        amplitude,
+        radius,
+        alpha,
+        first_row,
+        image_shape,
+        clip,
+    ):
+        """
+        Evaluate the Moffat profiles of a group of stars on the stamps spanned by their (n_stars, stamp width) `rows` and `columns`.
+        Returns the flat indices of the stamp pixels in the band of rows starting at `first_row`, and the profile at those pixels.
+        With `clip`, pixels outside of the image are dropped.
+        """
+        height, width = image_shape
+        per_star = (slice(None), np.newaxis, np.newaxis)
+
+        # Distances and indices are separable over the rows and columns of each stamp.
+        # Profiles are evaluated in single precision, which is plenty for the offsets within a stamp.
+        row_distance = ((rows - center_y[:, np.newaxis]) ** 2).astype(np.float32)
+        column_distance = ((columns - center_x[:, np.newaxis]) ** 2).astype(np.float32)
+        distance = row_distance[:, :, np.newaxis] + column_distance[:, np.newaxis, :]
+        distance /= (radius**2).astype(np.float32)[per_star]
+        profile = np.log1p(distance, out=distance)
+        profile *= -alpha.astype(np.float32)[per_star]
+        profile = np.exp(profile, out=profile)
+        profile *= amplitude.astype(np.float32)[per_star]
+
+        indices = ((rows - first_row) * width)[:, :, np.newaxis] + columns[
+            :, np.newaxis, :
+        ]
+
+        if clip:
+            inside = ((rows >= 0) & (rows < height))[:, :, np.newaxis] & (
+                (columns >= 0) & (columns < width)
+            )[:, np.newaxis, :]
+            return indices[inside], profile[inside]
+        return indices.ravel(), profile.ravel()
+
+    def create_object(
+        self,
+        center_x: Union[float, List[float]],
+        center_y: Union[float, List[float]],
+        amplitude: Union[float, List[float], None] = None,
+        radius: Union[float, List[float], None] = None,
+        alpha: Union[float, List[float]] = 1.0,
+        truncation: float = 1e-3,
+    ) -> np.ndarray:
+        """
+        Create the star field from the stamped Moffat profiles, with Poisson noise and the PSF applied once to the whole field.
+
+        Args:
+            center_x (Union[float, list[float]]): The x-axis placement of each star.
+            center_y (Union[float, list[float]]): The y-axis placement of each star.
+            amplitude (Union[float, list[float]], optional): Amplitude of each star. Defaults to None (the amplitude of the field).
+            radius (Union[float, list[float]], optional): Moffat gamma of each star. Defaults to None (the radius of the field).
+            alpha (Union[float, list[float]], optional): Moffat alpha of each star. Defaults to 1.0.
+            truncation (float, optional): Fraction of the amplitude each profile is truncated at. Defaults to 1e-3.
+
+        Returns:
+            ndarray: Two dimensional star field.
+
+        Examples:
+
+            >>> image = field.create_object(center_x=[3.0, 10.5], center_y=[4.0, 8.0], alpha=[1.0, 3.0])
+        """
+        image_shape = self.create_star_field(
+            center_x=center_x,
+            center_y=center_y,
+            amplitude=amplitude,
+            radius=radius,
+            alpha=alpha,
+            truncation=truncation,
+        )
+
+        # Noise of level 0 is all zeros, which is not worth drawing for a large field
+        if np.any(self._noise_level):
+            image_shape += self.create_noise()
+        image_shape = self.create_psf(image_shape)
+
+        return image_shape
+
+    def displayObject(self):
+        """
+        Display the object created in a 2d plot
+
+        Raises:
+            NotImplementedError: Raised if not implimented in the child class
+        """
+
+        raise NotImplementedError()
@@ -1,2 +1,3 @@
-from deepbench.collection.save import Save
+from deepbench.collection.save import Save, ThreadedSave, merge_shards, load_parameters
+from deepbench.collection.load import Load
 from deepbench.collection.collection import Collection
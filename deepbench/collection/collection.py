@@ -2,11 +2,28 @@ import inspect
 import deepbench.image as image
 import deepbench.astro_object as astro
 import deepbench.physics_object as physics
-from deepbench.collection import Save
+from deepbench.collection import Save, ThreadedSave
 
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import lru_cache
+from types import MappingProxyType
 import numpy as np
 import yaml
 import os 
+import zlib
+
+# Components of the seed tree. Every random draw made for an object is seeded from
+# (dataset seed, object index, component), see `Collection.object_seed`.
+# Parameter noise instead uses one stream per parameter, keyed on
+# (dataset seed, parameter name hash, _PARAMETER_NOISE_SEED), see `Collection.parameter_noise_table`.
+_OBJECT_SEED = 0
+_PARAMETER_NOISE_SEED = 1
+_IMAGE_NOISE_SEED = 2
+
+# Engine arguments that only control how an object is computed (where it is written),
+# not what it is: they are not parameters of the object, and are not saved.
+_RUNTIME_ARGUMENTS = frozenset({"out"})
 
 class Collection:
     """
@@ -26,11 +43,20 @@ class Collection:
             * total_runs: Number of times the simulation will be executed
             * image_parameters: parameters for the image itself. In single object images, this is the parameters for the parent class.
             * object parameters: list of objects that will be included in each image and their parameters
+            * workers (optional): Number of processes used to generate the objects. Defaults to 1 (serial).
+            * chunk_size (optional): Stream objects to disk in chunks of this size instead of holding them all in memory.
+            * queue_size (optional): When streaming, write chunks on a background thread fed by a queue of this size.
+            * parameter_format (optional): Format of the saved parameters, "yaml" or "h5" (columnar, stored with the data). Defaults to "yaml".
+            * seed (optional): Dataset seed, the root of the seeds used by every object. Drawn at random if not set.
+              It is saved with the dataset, as the `dataset_seed` parameter and attribute of `data`, so saved objects can be regenerated.
+            * shard_index, num_shards (optional): Only generate shard `shard_index` of `num_shards` disjoint ranges of object indices. Defaults to 0, 1.
         Defaults to None.
+        shard_index (int, optional): Shard of the dataset generated by this collection, overrides the configuration. Defaults to None.
+        num_shards (int, optional): Number of shards the dataset is split into, overrides the configuration. Defaults to None.
 
     """
 
-    def __init__(self, object_config: dict=None):
+    def __init__(self, object_config: dict=None, shard_index: int=None, num_shards: int=None):
 
         self.object_type = None
         self.object_name = None
@@ -42,6 +68,14 @@ class Collection:
 
         self.object_engine_classes = None 
         self.object_engine = None 
+        self._engine_defaults = None
+
+        self.workers = 1
+        self.chunk_size = None
+        self.parameter_format = "yaml"
+        self.queue_size = None
+        self.shard_index = 0
+        self.num_shards = 1
 
         self.n_objects = 0
         self.objects = {}
@@ -50,6 +84,12 @@ class Collection:
         if object_config is not None: 
             self._set_parameters(object_config)
 
+        if shard_index is not None:
+            self.shard_index = shard_index
+        if num_shards is not None:
+            self.num_shards = num_shards
+        assert 0 <= self.shard_index < self.num_shards, f"Shard index {self.shard_index} is not in range of the {self.num_shards} shards"
+
 
     def from_config(self, config_path:str):
         """
@@ -65,6 +105,7 @@ class Collection:
 
     def _set_parameters(self, object_config): 
 
+        self.object_config = object_config
         self.object_type = object_config["object_type"]
         self.object_name = object_config["object_name"]
 
@@ -87,13 +128,36 @@ class Collection:
         self.object_engine = self.object_engine_classes[self.object_name](
             **self.included_params
         )
+        self._engine_defaults = None
+        self.engine_defaults()
 
         self.n_objects = 0
         self.objects = {}
         self.object_params = {}
 
-        if "seed" in object_config:
-            self.seed = object_config["seed"]
+        self.seed = (
+            object_config["seed"]
+            if "seed" in object_config
+            else int(np.random.SeedSequence().generate_state(1)[0])
+        )
+
+        if "workers" in object_config:
+            self.workers = object_config["workers"]
+
+        if "chunk_size" in object_config:
+            self.chunk_size = object_config["chunk_size"]
+
+        if "queue_size" in object_config:
+            self.queue_size = object_config["queue_size"]
+
+        if "parameter_format" in object_config:
+            self.parameter_format = object_config["parameter_format"]
+
+        if "shard_index" in object_config:
+            self.shard_index = object_config["shard_index"]
+
+        if "num_shards" in object_config:
+            self.num_shards = object_config["num_shards"]
 
         if "parameter_noise" in object_config:
             self.parameter_noise = object_config["parameter_noise"]
@@ -104,90 +168,178 @@ class Collection:
                 os.makedirs(self.save_path)
 
 
-    def add_parameter_noise(self, seed, params):
+    def _parameter_noise_generator(self, name, offset):
         """
-        Add noise to the image wide parameters
+        Generator for the noise stream of the parameter `name`, advanced by `offset` draws.
+        Each object uses a fixed window of the stream, so the noise of one object can be drawn on its own
+        or together with its neighbours and comes out the same.
+        """
+        bit_generator = np.random.PCG64(
+            np.random.SeedSequence(
+                self.seed, spawn_key=(zlib.crc32(name.encode()), _PARAMETER_NOISE_SEED)
+            )
+        )
+        bit_generator.advance(offset)
+        return np.random.Generator(bit_generator)
+
+    def add_parameter_noise(self, index=None, params=None, name="", seed=None):
+        """
+        Add noise to the image wide parameters of a single object.
+        Each numeric parameter draws from its own stream, see `Collection.parameter_noise_table`.
+
+        Before streams were keyed on the object index, the first argument was the seed of the noise.
+        That form is still available as `add_parameter_noise(seed=seed, params=params)`,
+        which draws the noise of every parameter from `np.random.default_rng(seed)` as before.
 
         Args:
-            seed (int): integer stored by the program to denote the noise seed added to the object
+            index (int): Index of the object in the dataset
             params (dict): parameters that have added noise.
+            name (str, optional): Name of the group of parameters (e.g. "star/object" for sky images), to key their noise streams. Defaults to "".
+            seed (int, optional): Seed of the noise, instead of the stream of the object at `index`. Defaults to None.
 
         Returns:
             dict: parameters with added uniform noise
         """
+        noisy_object_parameters = dict(params)
         if hasattr(self, "parameter_noise"):
-            noisy_object_parameters = {
-                key: params[key]
-                + np.random.default_rng(seed=seed).uniform(
-                    high=self.parameter_noise, size=len(params[key])
+            for key, value in params.items():
+                if not _add_noise_to(value):
+                    continue
+                if seed is not None:
+                    generator = np.random.default_rng(seed=seed)
+                else:
+                    generator = self._parameter_noise_generator(
+                        f"{name}/{key}" if name else key, index * np.size(value)
+                    )
+                noisy_object_parameters[key] = _as_python(
+                    value
+                    + generator.uniform(high=self.parameter_noise, size=np.shape(value))
                 )
-                for key in params.keys()
-            }
-            return noisy_object_parameters
 
-        else:
-            return params
+        return noisy_object_parameters
 
-    def engine_defaults(self):
+    def parameter_noise_table(self, first_index, n_objects, params, name=""):
         """
-        Locate the default parameters for any simulation being called, via the `inspect.signature` method
+        Add noise to the image wide parameters of a run of objects at once, with one vectorized draw per parameter.
+        Parameters draw from independent streams, and each object from a fixed window of the stream,
+        so the values are identical to calling `Collection.add_parameter_noise` for each object.
+
+        Args:
+            first_index (int): Index of the first object in the dataset
+            n_objects (int): Number of consecutive objects
+            params (dict): parameters that have added noise.
+            name (str, optional): Name of the group of parameters (e.g. "star/object" for sky images), to key their noise streams. Defaults to "".
 
         Returns:
-            dict: all the parameters either default to the called object or modified by the program
+            dict: noisy parameters, as arrays of shape (n_objects, *parameter shape). Parameters without noise are not included.
+        """
+        table = {}
+        if hasattr(self, "parameter_noise"):
+            for key, value in params.items():
+                if not _add_noise_to(value):
+                    continue
+                generator = self._parameter_noise_generator(
+                    f"{name}/{key}" if name else key, first_index * np.size(value)
+                )
+                table[key] = np.asarray(value) + generator.uniform(
+                    high=self.parameter_noise, size=(n_objects, *np.shape(value))
+                )
+
+        return table
+
+    def _parameter_groups(self):
+        """
+        Name and rules of each group of parameters passed to the engine, in the order `_create_object` uses them
         """
-        init_signature = inspect.signature(
-            self.object_engine_classes[self.object_name].__init__
-        )
-        init_signature_defaults = {
-            k: v.default
-            for k, v in init_signature.parameters.items()
-            if v.default is not inspect.Parameter.empty
-        }
         if self.object_type in ["sky", "shape"]:
-            create = self.object_engine.combine_objects
+            return [
+                (f"{key}/{kind}", self.object_rules[key][kind])
+                for key in self.object_rules.keys()
+                for kind in ["instance", "object"]
+            ]
+        return [("", self.object_rules)]
 
-        elif self.object_type in ["physics", "astro"]:
-            create = self.object_engine.create_object
+    def engine_defaults(self):
+        """
+        Locate the default parameters for any simulation being called, via the `inspect.signature` method.
+        Resolved once per engine class and shared between objects.
 
-        create_signature = inspect.signature(create)
-        create_signature_defaults = {
-            k: v.default
-            for k, v in create_signature.parameters.items()
-            if v.default is not inspect.Parameter.empty
-        }
-        return {**init_signature_defaults, **create_signature_defaults}
+        Returns:
+            Mapping: all the parameters either default to the called object or modified by the program (read only)
+        """
+        if self._engine_defaults is None:
+            engine_class = self.object_engine_classes[self.object_name]
+            create = (
+                "combine_objects" if self.object_type in ["sky", "shape"] else "create_object"
+            )
+            self._engine_defaults = MappingProxyType({
+                **_signature_defaults(engine_class, "__init__"),
+                **_signature_defaults(engine_class, create),
+            })
+        return self._engine_defaults
+
+    @property
+    def object_indices(self):
+        """
+        Indices of the objects generated by this collection: its shard of `range(total_runs)`.
 
-    def add_object(self):
+        Returns:
+            range: contiguous range of object indices
         """
-        Use the parameters set by the configuration file to create an object and store that and its associated parameters
-        Adds noise to parameters if set by the program perviously
+        start = self.total_objects * self.shard_index // self.num_shards
+        stop = self.total_objects * (self.shard_index + 1) // self.num_shards
+        return range(start, stop)
 
-        If the specified object is a composite image, it will only find the default values for the compositor method, not the indivual simulations
+    def object_seed(self, index, component=_OBJECT_SEED):
+        """
+        Seed for one component of the object at `index` (the object itself, or its image noise).
+        Seeds come from a tree rooted at the dataset seed and keyed on (index, component),
+        so any object can be regenerated on its own, and the seeds do not depend on how many workers or shards are used.
 
+        Args:
+            index (int): Index of the object in the dataset
+            component (int, optional): Which random draw of the object the seed is for. Defaults to the object seed.
+
+        Returns:
+            int: random seed
         """
-        assert self.object_type is not None, "Collection parameters not initialized, please run collection.from_config(your_configuration_path)"
+        return int(
+            np.random.SeedSequence(self.seed, spawn_key=(index, component)).generate_state(1)[0]
+        )
 
+    def _create_object(self, index, noisy_parameters=None):
+        """
+        Create a single object and its parameters from the configuration, without storing them
+
+        Args:
+            index (int): Index of the object in the dataset, used to derive its seeds
+            noisy_parameters (list[dict], optional): Parameters for each of the `_parameter_groups`, with noise already added. Defaults to None (drawn for this object).
+
+        Returns:
+            tuple(object, dict): the generated object and all parameters used to make it
+        """
+        # Seed passed to the engine: the object seed for single objects, the image noise seed for compositions
         random_seed = (
-            np.random.default_rng().integers(1, 10**6, size=1)[0]
-            if not hasattr(self, "seed")
-            else self.seed
+            self.object_seed(index, _IMAGE_NOISE_SEED)
+            if self.object_type in ["sky", "shape"]
+            else self.object_seed(index)
         )
 
-        if self.object_type in ["sky", "shape"]:
-            instance_parameters = [
-                self.add_parameter_noise(
-                    random_seed, self.object_rules[key]["instance"]
-                )
-                for key in self.object_rules.keys()
+        if noisy_parameters is None:
+            noisy_parameters = [
+                self.add_parameter_noise(index, params, name)
+                for name, params in self._parameter_groups()
             ]
 
-            object_parameters = [
-                self.add_parameter_noise(random_seed, self.object_rules[key]["object"])
-                for key in self.object_rules.keys()
-            ]
+        if self.object_type in ["sky", "shape"]:
+            instance_parameters = noisy_parameters[0::2]
+            object_parameters = noisy_parameters[1::2]
 
             object = self.object_engine.combine_objects(
-                self.object_rules.keys(), instance_parameters, object_parameters
+                self.object_rules.keys(),
+                instance_parameters,
+                object_parameters,
+                seed=random_seed,
             )
 
             object_parameters = {
@@ -199,54 +351,328 @@ class Collection:
             }
 
         elif self.object_type in ["physics", "astro"]:
-            object_parameters = self.add_parameter_noise(random_seed, self.object_rules)
+            object_parameters = noisy_parameters[0]
             object_parameters["seed"] = random_seed
 
             object = self.object_engine.create_object(**object_parameters)
 
-        self.objects[self.n_objects] = object
-
-        self.object_params[self.n_objects] = {
+        params = {
             **self.engine_defaults(),
             **object_parameters,
         }
-        self.object_params[self.n_objects] = {
-            **self.object_params[self.n_objects],
+        params = {
+            **params,
             **self.included_params,
         }
-        self.object_params[self.n_objects]["seed"] = random_seed
+        params["seed"] = random_seed
+        params["dataset_seed"] = self.seed
+
+        return object, params
+
+    def regenerate(self, index):
+        """
+        Create the object at `index` on its own, identical to the one produced by a full run with the same dataset seed.
+        Nothing is stored in the collection.
+        For a saved dataset, use the configuration with `seed` set to its `dataset_seed`.
+
+        Args:
+            index (int): Index of the object in the dataset
+
+        Returns:
+            tuple(object, dict): the object and all parameters used to make it
+        """
+        assert self.object_type is not None, "Collection parameters not initialized, please run collection.from_config(your_configuration_path)"
+        return self._create_object(index)
+
+    def add_object(self):
+        """
+        Use the parameters set by the configuration file to create an object and store that and its associated parameters
+        Adds noise to parameters if set by the program perviously
+
+        If the specified object is a composite image, it will only find the default values for the compositor method, not the indivual simulations
+
+        """
+        assert self.object_type is not None, "Collection parameters not initialized, please run collection.from_config(your_configuration_path)"
+
+        index = self.object_indices.start + self.n_objects
+        object, params = self._create_object(index)
+
+        self.objects[index] = object
+        self.object_params[index] = params
 
         self.n_objects += 1
 
-    def __call__(self):
+    def _create_objects(self, indices):
+        """
+        Create the objects at a contiguous range of indices, drawing the parameter noise of all of them at once
+
+        Args:
+            indices (range): indices of the objects to create
+
+        Returns:
+            list[tuple(object, dict)]: objects and parameters, in the order of `indices`
+        """
+        groups = self._parameter_groups()
+        tables = [
+            self.parameter_noise_table(indices.start, len(indices), params, name)
+            for name, params in groups
+        ]
+
+        objects = []
+        for row, index in enumerate(indices):
+            noisy_parameters = [
+                {**params, **{key: _as_python(column[row]) for key, column in table.items()}}
+                for (_, params), table in zip(groups, tables)
+            ]
+            objects.append(self._create_object(index, noisy_parameters))
+        return objects
+
+    def _add_objects_parallel(self, n_objects, workers, executor):
+        """
+        Create `n_objects` objects across a pool of `workers` processes.
+        Each object is seeded from its index, so the results match a serial run,
+        and objects are stored in the same index order a serial run would use.
+
+        Args:
+            n_objects (int): Number of objects to create
+            workers (int): Number of processes in the pool
+            executor (ProcessPoolExecutor): Pool from `Collection._pool`, reused between calls
+        """
+        assert self.object_type is not None, "Collection parameters not initialized, please run collection.from_config(your_configuration_path)"
+
+        # A few chunks per worker keeps the pool balanced without paying
+        # the process round trip for every object
+        start = self.object_indices.start + self.n_objects
+        index_chunks = [
+            range(chunk[0], chunk[-1] + 1)
+            for chunk in np.array_split(
+                np.arange(start, start + n_objects), workers * 4
+            )
+            if len(chunk) > 0
+        ]
+
+        for indices, chunk in zip(index_chunks, executor.map(_create_objects, index_chunks)):
+            for index, (object, params) in zip(indices, chunk):
+                self.objects[index] = object
+                self.object_params[index] = params
+                self.n_objects += 1
+
+    def _pool(self, workers):
+        """
+        Process pool used to create objects, started once per run and reused for every chunk.
+        Each worker builds its collection from the configuration once, when it starts.
+
+        Args:
+            workers (int): Number of processes. 1 runs serially, without a pool.
+
+        Returns:
+            context manager: the ProcessPoolExecutor, or None when running serially
+        """
+        if workers <= 1:
+            return nullcontext()
+        # Workers share the dataset seed, even when it was drawn at random
+        object_config = {**self.object_config, "seed": self.seed}
+        return ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(object_config,)
+        )
+
+    def _add_objects(self, n_objects, workers, executor=None):
+        """
+        Create `n_objects` objects, serially or across a process pool.
+
+        Args:
+            n_objects (int): Number of objects to create
+            workers (int): Number of processes used. 1 runs serially.
+            executor (ProcessPoolExecutor, optional): Pool to reuse, see `Collection._pool`. Defaults to None (a pool for this call only).
+        """
+        assert self.object_type is not None, "Collection parameters not initialized, please run collection.from_config(your_configuration_path)"
+
+        if workers > 1 and executor is None:
+            with self._pool(workers) as executor:
+                self._add_objects_parallel(n_objects, workers, executor)
+        elif workers > 1:
+            self._add_objects_parallel(n_objects, workers, executor)
+        else:
+            start = self.object_indices.start + self.n_objects
+            indices = range(start, start + n_objects)
+            for index, (object, params) in zip(indices, self._create_objects(indices)):
+                self.objects[index] = object
+                self.object_params[index] = params
+                self.n_objects += 1
+
+    def __call__(self, workers:int=None, chunk_size:int=None):
         """
         Create N objects and add them to the `objects` variable.
+        When the dataset is sharded, only the objects in this collection's shard (`object_indices`) are created.
+        If a chunk size is given (or set with `chunk_size` in the configuration), objects are instead streamed to disk, see `Collection.stream`.
+
+        Args:
+            workers (int, optional): Number of processes used to generate the objects. Defaults to the `workers` set in the configuration (1, serial, if not set).
+            chunk_size (int, optional): Number of objects held in memory at once when streaming. Defaults to the `chunk_size` set in the configuration (no streaming if not set).
         """
-        for _ in range(self.total_objects):
-            self.add_object()
+        workers = self.workers if workers is None else workers
+        chunk_size = self.chunk_size if chunk_size is None else chunk_size
+
+        if chunk_size is not None:
+            self.stream(chunk_size=chunk_size, workers=workers)
+            return
+
+        self._add_objects(len(self.object_indices), workers)
         
         if hasattr(self, "save_path"): 
             self.save()
 
-
-    def save(self, save_path:str=None, format:str='h5'): 
+    def stream(self, save_path:str=None, chunk_size:int=1000, workers:int=None, queue_size:int=None, **save_options):
         """
-        Save generated dataset to path of your choosing. 
-        If the path is not specified, the program will look for a save path to be specified by the configation_file 
+        Create N objects and write them to `dataset.h5` (`dataset_shard<shard_index>.h5` when sharded) in chunks as they are generated,
+        so only `chunk_size` objects are held in memory at once.
+        The parameters of each chunk are written along with its objects, see `Save.append`.
+        `objects` and `object_params` are emptied after each chunk is written.
+        With several workers, one process pool is used for every chunk.
+        With a `queue_size`, chunks are written by a background thread (see `ThreadedSave`),
+        so generation continues while the previous chunks are written, holding at most `queue_size` chunks waiting in memory.
 
         Args:
-            save_path (str, optional): directory, location to save a file. Will be created if does not already exist. Defaults to None.
-            format (str, optional): Format to save the file in. Defaults to h5.
+            save_path (str, optional): directory, location to save a file. Will be created if does not already exist. Defaults to the path set in the configuration.
+            chunk_size (int, optional): Number of objects generated before they are written to disk. Defaults to 1000.
+            workers (int, optional): Number of processes used to generate the objects. Defaults to the `workers` set in the configuration.
+            queue_size (int, optional): Number of chunks queued for the background writer. Defaults to the `queue_size` set in the configuration (written on the generating thread if not set).
+            save_options: h5 output options (chunks, compression, compression_opts, shuffle, dtype), see `Collection.save`.
         """
+        assert self.object_type is not None, "Collection parameters not initialized, please run collection.from_config(your_configuration_path)"
 
+        save_path = self._resolve_save_path(save_path)
+        workers = self.workers if workers is None else workers
+        queue_size = self.queue_size if queue_size is None else queue_size
+
+        save = Save(self, save_path, parameter_format=self.parameter_format, **save_options)
+        if queue_size is not None:
+            save = ThreadedSave(save, queue_size=queue_size)
+        n_objects = len(self.object_indices)
+        completed = False
+        try:
+            with self._pool(workers) as executor:
+                for start in range(0, n_objects, chunk_size):
+                    self._add_objects(min(chunk_size, n_objects - start), workers, executor)
+                    save.append(list(self.objects.values()), dict(self.object_params))
+                    self.objects.clear()
+                    self.object_params.clear()
+            completed = True
+        finally:
+            # A failed run still stops the writer thread and closes the file
+            if completed:
+                save.close()
+            else:
+                save.abort()
+
+    def _resolve_save_path(self, save_path):
         if save_path is None: 
             assert hasattr(self, "save_path"), "Could not parse save path from config, please supply it manually"
             save_path = self.save_path
         
         if not os.path.exists(save_path):
             os.makedirs(save_path)
-        
-        Save(self, save_path)(format=format)
 
-        
-        
\ No newline at end of file
+        return save_path
+
+    def save(
+        self,
+        save_path:str=None,
+        format:str='h5',
+        parameter_format:str=None,
+        chunks=None,
+        compression:str=None,
+        compression_opts:int=None,
+        shuffle:bool=False,
+        dtype:str="float32",
+    ): 
+        """
+        Save generated dataset to path of your choosing. 
+        If the path is not specified, the program will look for a save path to be specified by the configation_file 
+
+        Args:
+            save_path (str, optional): directory, location to save a file. Will be created if does not already exist. Defaults to None.
+            format (str, optional): Format to save the file in, "h5" or "npy" (a raw array that can be memory mapped). Defaults to h5.
+            parameter_format (str, optional): Format to save the parameters in, "yaml" or "h5". Defaults to the `parameter_format` set in the configuration ("yaml" if not set).
+            chunks (Union[tuple, bool], optional): h5 chunk shape of the objects. None stores one object per chunk, False stores them contiguously. Defaults to None.
+            compression (str, optional): h5 compression filter, "gzip" or "lzf". Defaults to None.
+            compression_opts (int, optional): Compression level for gzip (0-9). Defaults to None.
+            shuffle (bool, optional): Apply the h5 shuffle filter before compressing. Defaults to False.
+            dtype (str, optional): Type of the saved objects, "float32", "float16" or "uint8" (rescaled per object, with the scale and offset saved alongside). Defaults to "float32".
+        """
+        save_path = self._resolve_save_path(save_path)
+        parameter_format = self.parameter_format if parameter_format is None else parameter_format
+        Save(
+            self,
+            save_path,
+            parameter_format=parameter_format,
+            chunks=chunks,
+            compression=compression,
+            compression_opts=compression_opts,
+            shuffle=shuffle,
+            dtype=dtype,
+        )(format=format)
+
+
+# Collection of a pool worker process, built once by `_init_worker`
+_worker_collection = None
+
+
+def _init_worker(object_config):
+    """
+    Process pool initializer: build the collection of this worker from the configuration.
+
+    Args:
+        object_config (dict): configuration used by the parent collection, including its dataset seed
+    """
+    global _worker_collection
+    _worker_collection = Collection(object_config)
+
+
+def _create_objects(indices):
+    """
+    Process pool entry point: create the objects at the given indices with the collection of this worker.
+
+    Args:
+        indices (range): contiguous indices of the objects to create
+
+    Returns:
+        list[tuple(object, dict)]: objects and parameters, in the order of `indices`
+    """
+    return _worker_collection._create_objects(indices)
+
+
+def _as_python(value):
+    """
+    Noisy scalars as Python numbers, so the parameters can be saved as yaml. Arrays are kept as they are.
+    """
+    return value.item() if np.ndim(value) == 0 and hasattr(value, "item") else value
+
+
+def _add_noise_to(value):
+    """
+    If parameter noise applies to a parameter value: numbers and arrays of numbers, but not booleans
+    """
+    if isinstance(value, (bool, np.bool_, str, dict)):
+        return False
+    try:
+        return np.asarray(value).dtype.kind in "iuf"
+    except ValueError:
+        return False
+
+
+@lru_cache(maxsize=None)
+def _signature_defaults(engine_class, method_name):
+    """
+    Default values of the arguments of `engine_class.method_name`, computed once per class and method.
+    Runtime-only arguments (`_RUNTIME_ARGUMENTS`, such as an output buffer) are left out.
+
+    Returns:
+        Mapping: argument name to default value (read only)
+    """
+    signature = inspect.signature(getattr(engine_class, method_name))
+    return MappingProxyType({
+        k: v.default
+        for k, v in signature.parameters.items()
+        if v.default is not inspect.Parameter.empty and k not in _RUNTIME_ARGUMENTS
+    })
@@ -0,0 +1,183 @@
+import os
+
+import yaml
+import h5py
+import numpy as np
+
+from deepbench.collection.save import load_parameters, _group_names
+
+
+class Load:
+    """
+    Lazy, random access reader for a dataset written by `deepbench.collection.Save`.
+    Objects are only read from disk when indexed. Raw `.npy` datasets and contiguous, uncompressed
+    h5 datasets are memory mapped; chunked or compressed h5 datasets are read through h5py.
+    uint8 datasets are returned rescaled to their saved values.
+
+    Args:
+        save_path (str): Directory the dataset was saved to
+        name (str, optional): Base name of the dataset files, e.g. "dataset_shard0" for a single shard. Defaults to "dataset".
+        memmap (bool, optional): Memory map the objects when the layout allows it. Defaults to True.
+
+    Examples:
+
+        >>> dataset = Load("results/")
+        >>> image = dataset[4]
+        >>> images, params = dataset.get_batch([10, 3, 7])
+    """
+
+    def __init__(self, save_path: str, name: str = "dataset", memmap: bool = True):
+        save_path = save_path.rstrip("/")
+        self.h5_path = f"{save_path}/{name}.h5"
+        self.yaml_path = f"{save_path}/{name}_parameters.yaml"
+
+        self._file = None
+        self._scale = None
+        self._offset = None
+        self._params = None
+        self._varying = None
+
+        npy_path = f"{save_path}/{name}.npy"
+        if os.path.exists(npy_path):
+            self.data = np.load(npy_path, mmap_mode="r" if memmap else None)
+        else:
+            self._file = h5py.File(self.h5_path, "r")
+            self.data = self._file["data"]
+
+            if "data_scale" in self._file:
+                self._scale = self._file["data_scale"][()]
+                self._offset = self._file["data_offset"][()]
+
+            if memmap:
+                self.data = self._memmap(self.data)
+
+    def _memmap(self, data):
+        """
+        Map a h5 dataset directly if it is stored as one contiguous, unfiltered block, otherwise keep the h5 dataset
+        """
+        if data.chunks is not None or data.is_virtual or data.compression is not None:
+            return data
+
+        offset = data.id.get_offset()
+        if offset is None:
+            return data
+
+        return np.memmap(
+            self.h5_path, mode="r", dtype=data.dtype, offset=offset, shape=data.shape
+        )
+
+    def __len__(self):
+        return self.data.shape[0]
+
+    def __getitem__(self, index):
+        """
+        Read objects by integer index, slice, or list of indices (in any order, with repeats).
+
+        Returns:
+            np.ndarray: the selected objects
+        """
+        if isinstance(self.data, h5py.Dataset) and not isinstance(
+            index, (int, np.integer, slice)
+        ):
+            # h5py only reads increasing, unique indices
+            index = np.asarray(index)
+            unique_index, inverse = np.unique(index, return_inverse=True)
+            objects = self.data[unique_index][inverse.reshape(index.shape)]
+        else:
+            objects = self.data[index]
+
+        objects = np.asarray(objects)
+        if self._scale is not None:
+            scale = self._scale[index]
+            offset = self._offset[index]
+            extra_dims = (np.newaxis,) * (self.data.ndim - 1)
+            objects = (
+                objects * np.asarray(scale, dtype=np.float32)[(..., *extra_dims)]
+                + np.asarray(offset, dtype=np.float32)[(..., *extra_dims)]
+            )
+        return objects
+
+    @property
+    def params(self):
+        """
+        Parameters of the dataset, loaded on first use.
+        From the h5 (columnar) format, a dict of parameter name to value, where parameters that vary between objects have one entry per object.
+        From the yaml format, a dict of object index to the parameters of that object.
+        """
+        if self._params is None:
+            self._params = {}
+            if os.path.exists(self.h5_path):
+                with h5py.File(self.h5_path, "r") as f:
+                    if "parameters" in f:
+                        self._varying = [
+                            "index",
+                            *_group_names(f["parameters"], "columns"),
+                        ]
+                if self._varying is not None:
+                    self._params = load_parameters(self.h5_path)
+
+            if self._varying is None and os.path.exists(self.yaml_path):
+                with open(self.yaml_path) as f:
+                    self._params = yaml.safe_load(f)
+        return self._params
+
+    def get_params(self, index):
+        """
+        Parameters of the objects at positions `index` (integer, slice or list of indices) in the dataset.
+
+        Returns:
+            dict: for the h5 format, parameter name to value, with varying parameters selected at `index`.
+            For the yaml format, the parameters of the object (integer index) or object index to parameters.
+        """
+        params = self.params
+        if self._varying is not None:
+            return {
+                name: _select(value, index) if name in self._varying else value
+                for name, value in params.items()
+            }
+
+        keys = sorted(params.keys())
+        if isinstance(index, (int, np.integer)):
+            return params[keys[index]]
+        return {
+            keys[position]: params[keys[position]]
+            for position in np.arange(len(keys))[index]
+        }
+
+    def get_batch(self, index):
+        """
+        Read a batch of objects and their parameters.
+
+        Args:
+            index (Union[list, slice, np.ndarray]): positions of the objects in the dataset
+
+        Returns:
+            tuple(np.ndarray, dict): objects, and their parameters (see `Load.get_params`)
+        """
+        return self[index], self.get_params(index)
+
+    def close(self):
+        """
+        Close the dataset file
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _select(values, index):
+    if isinstance(values, list):
+        # yaml encoded columns are lists of python objects
+        positions = np.arange(len(values))[index]
+        return (
+            values[positions]
+            if np.ndim(positions) == 0
+            else [values[position] for position in positions]
+        )
+    return values[index]
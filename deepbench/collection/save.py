@@ -1,45 +1,708 @@
-import yaml 
+import os
+import queue
+import threading
+from glob import glob
+from itertools import islice
+
+import yaml
 import h5py
-import numpy as np 
+import numpy as np
+
+# Objects are stacked and written in slabs of about this many bytes,
+# so a save makes few h5 writes without holding a second full copy of the dataset
+_SLAB_BYTES = 2**26
+# Parameter columns are read in blocks of this many rows when looking for constant columns
+_PARAMETER_ROWS = 2**16
 
-class Save: 
+class Save:
     """
-    _summary_
+    Write the objects and parameters of a collection to disk.
+    Either all at once (`Save(collection, path)(format)`, as h5 or a raw `.npy` array) or incrementally to h5, using `append` and `close`.
+    Saved datasets can be read back with `deepbench.collection.Load`.
+    The dataset seed of the collection is saved as the `dataset_seed` attribute of `data`, see `Collection.regenerate`.
+    A sharded collection is saved to `dataset_shard<shard_index>.h5`, see `merge_shards` to combine the shards.
+
+    Parameters are saved either as a yaml file (`dataset_parameters.yaml`)
+    or as columns in the `parameters` group of the h5 file, read back with `load_parameters`.
+    Columns with the same value for every object are stored once under `parameters/constants`,
+    the rest as one typed array per parameter under `parameters/columns`.
+    When streaming, the parameters passed to `append` are written with their objects,
+    appended to the yaml file or to resizable columns, so they are not held in memory until `close`.
 
     Args:
         collection_instance (deepbench.collection.Collection): Instance of a collection to save
         save_path (str): Directory to save to
+        parameter_format (str, optional): Format of the saved parameters, "yaml" or "h5". Defaults to "yaml".
+        chunks (Union[tuple, bool], optional): h5 chunk shape of `data`. None stores one object per chunk, False stores `data` contiguously (not possible when streaming or compressing). Defaults to None.
+        compression (str, optional): h5 compression filter for `data`, "gzip" or "lzf". Defaults to None.
+        compression_opts (int, optional): Compression level for gzip (0-9). Defaults to None.
+        shuffle (bool, optional): Apply the h5 shuffle filter before compressing. Defaults to False.
+        dtype (str, optional): Type of the saved objects, "float32", "float16" or "uint8".
+            uint8 objects are rescaled to 0-255 each, with the scale and offset to undo it saved in `data_scale` and `data_offset`
+            (`object = data * data_scale + data_offset`). Defaults to "float32".
     """
-    def __init__(self, collection_instance, save_path) -> None:
+    def __init__(
+        self,
+        collection_instance,
+        save_path,
+        parameter_format="yaml",
+        chunks=None,
+        compression=None,
+        compression_opts=None,
+        shuffle=False,
+        dtype="float32",
+    ) -> None:
         self.objects = collection_instance.objects
-        self.params = collection_instance.object_params 
-        self._clean_params()
-        self.save_path = save_path
-        
+        self.params = collection_instance.object_params
+        self.save_path = save_path.rstrip('/')
+        self.parameter_format = parameter_format
+
+        if dtype not in ["float32", "float16", "uint8"]:
+            raise NotImplementedError(f"{dtype} output type not available")
+        self.dtype = np.dtype(dtype)
+        self.chunks = chunks
+        self.compression = compression
+        self.compression_opts = compression_opts
+        self.shuffle = shuffle
 
-    def _save_parameters(self): 
-        with open(f"{self.save_path.rstrip('/')}/dataset_parameters.yaml", 'w') as f:
+        self.shard_index = collection_instance.shard_index
+        self.num_shards = collection_instance.num_shards
+        self.first_index = collection_instance.object_indices.start
+        self.dataset_seed = collection_instance.seed
+        self.name = "dataset" if self.num_shards == 1 else f"dataset_shard{self.shard_index}"
+
+        self._h5_file = None
+        # Parameters were written with the objects by `append`
+        self._appended_parameters = False
+
+
+    def _save_parameters(self):
+        options = {
+            "yaml": self._save_yaml_parameters,
+            "h5": self._save_h5_parameters,
+        }
+        if self.parameter_format not in options.keys():
+            raise NotImplementedError(f"{self.parameter_format} parameter format not available")
+
+        options[self.parameter_format]()
+
+    def _save_yaml_parameters(self):
+        self._clean_params()
+        with open(f"{self.save_path}/{self.name}_parameters.yaml", 'w') as f:
             yaml.safe_dump(self.params, f)
 
-    def _clean_params(self): 
-        for key in self.params: 
-            for subkey in self.params[key]: 
-                if "tolist" in dir(self.params[key][subkey]): 
-                    self.params[key][subkey] = self.params[key][subkey].tolist() 
+    def _save_h5_parameters(self):
+        with h5py.File(f"{self.save_path}/{self.name}.h5", 'a') as f:
+            if "parameters" in f:
+                del f["parameters"]
+            group = f.create_group("parameters")
+            _append_h5_parameters(group, self.params)
+            _collect_constants(group)
+
+    def _append_parameters(self, params):
+        """
+        Write the parameters of a chunk of objects after the ones already written:
+        appended to the yaml file (a top level mapping, so chunks concatenate), or to the columns of the `parameters` group.
+        """
+        if self.parameter_format == "yaml":
+            mode = 'a' if self._appended_parameters else 'w'
+            with open(f"{self.save_path}/{self.name}_parameters.yaml", mode) as f:
+                yaml.safe_dump(_clean_value(params), f)
+        elif self.parameter_format == "h5":
+            if "parameters" not in self._h5_file:
+                self._h5_file.create_group("parameters")
+            _append_h5_parameters(self._h5_file["parameters"], params)
+        else:
+            raise NotImplementedError(f"{self.parameter_format} parameter format not available")
+        self._appended_parameters = True
+
+    def _clean_params(self):
+        for key in self.params:
+            self.params[key] = _clean_value(self.params[key])
+
+    def _add_shard_attributes(self, data):
+        data.attrs['shard_index'] = self.shard_index
+        data.attrs['num_shards'] = self.num_shards
+        data.attrs['first_index'] = self.first_index
+        data.attrs['dataset_seed'] = self.dataset_seed
+
+    def _create_data(self, f, n_objects, object_shape, resizable=False):
+        """
+        Create the `data` dataset (and the per object `data_scale`/`data_offset` for uint8 output)
+        with the chunking, compression and type options of this save.
+        """
+        chunks = self.chunks
+        if chunks is None or (chunks is False and (resizable or self.compression is not None)):
+            # One object per chunk, so single objects can be read without touching their neighbours
+            chunks = (1, *object_shape)
+        elif chunks is False:
+            chunks = None
+
+        data = f.create_dataset(
+            'data',
+            shape=(n_objects, *object_shape),
+            maxshape=(None, *object_shape) if resizable else None,
+            chunks=chunks,
+            dtype=self.dtype,
+            compression=self.compression,
+            compression_opts=self.compression_opts,
+            shuffle=self.shuffle,
+        )
+        self._add_shard_attributes(data)
+
+        if self.dtype == np.uint8:
+            for name in ['data_scale', 'data_offset']:
+                f.create_dataset(
+                    name,
+                    shape=(n_objects,),
+                    maxshape=(None,) if resizable else None,
+                    dtype=np.float32,
+                )
+
+        return data
+
+    def _write_objects(self, f, start, objects):
+        data = f['data']
+        object_bytes = max(1, int(np.prod(data.shape[1:])) * np.dtype(np.float64).itemsize)
+        slab_size = max(1, _SLAB_BYTES // object_bytes)
+
+        objects = iter(objects)
+        while True:
+            block = list(islice(objects, slab_size))
+            if len(block) == 0:
+                return
+            stop = start + len(block)
+            slab = np.stack(block)
+            if self.dtype == np.uint8:
+                slab, scale, offset = _quantize(slab)
+                f['data_scale'][start:stop] = scale
+                f['data_offset'][start:stop] = offset
+            data[start:stop] = slab
+            start = stop
+
+    def _object_shape(self):
+        if len(self.objects) == 0:
+            raise ValueError("The collection has no objects to save, create them before saving.")
+        return np.shape(next(iter(self.objects.values())))
 
     def _save_h5(self):
-        object_array = np.array(list(self.objects.values()), dtype=np.float32)
-        f = h5py.File(f"{self.save_path.rstrip('/')}/dataset.h5",'w')
+        object_shape = self._object_shape()
+        with h5py.File(f"{self.save_path}/{self.name}.h5",'w') as f:
+            self._create_data(f, len(self.objects), object_shape)
+            self._write_objects(f, 0, self.objects.values())
+
+    def _save_npy(self):
+        if self.dtype == np.uint8:
+            raise NotImplementedError("uint8 output is only available for h5")
+
+        object_shape = self._object_shape()
+        data = np.lib.format.open_memmap(
+            f"{self.save_path}/{self.name}.npy",
+            mode='w+',
+            dtype=self.dtype,
+            shape=(len(self.objects), *object_shape),
+        )
+        for index, object in enumerate(self.objects.values()):
+            data[index] = object
+        data.flush()
+        del data
+
+    def append(self, objects:list, params:dict=None):
+        """
+        Append objects to the `data` dataset of the h5 file.
+        The file and a resizable dataset are created on the first call.
 
-        f.create_dataset('data',data=object_array,dtype=np.float32)
-        f.close()
+        Args:
+            objects (list[np.ndarray]): objects to write, all of the same shape
+            params (dict, optional): parameters of the objects, by object index, written along with them.
+                Defaults to None (the parameters of the collection are written by `close`).
+        """
+        if len(objects) == 0:
+            return
+
+        if self._h5_file is None:
+            self._h5_file = h5py.File(f"{self.save_path}/{self.name}.h5",'w')
+            self._create_data(self._h5_file, 0, np.shape(objects[0]), resizable=True)
+
+        start = self._h5_file['data'].shape[0]
+        for name in ['data', 'data_scale', 'data_offset']:
+            if name in self._h5_file:
+                self._h5_file[name].resize(start + len(objects), axis=0)
+        self._write_objects(self._h5_file, start, objects)
+        if params is not None:
+            self._append_parameters(params)
+
+    def close(self):
+        """
+        Finish an incremental save: close the h5 file and write the parameters of every object,
+        or, when they were written by `append`, move the h5 parameter columns that are constant to `parameters/constants`.
+        """
+        if not self._appended_parameters:
+            self._close_h5()
+            self._save_parameters()
+            return
+
+        if self.parameter_format == "h5":
+            _collect_constants(self._h5_file["parameters"])
+        self._close_h5()
+
+    def abort(self):
+        """
+        Stop an incremental save that will not be finished: close the h5 file.
+        Only the parameters already written by `append` are saved, those of the objects in the file.
+        """
+        self._close_h5()
+
+    def _close_h5(self):
+        if self._h5_file is not None:
+            self._h5_file.close()
+            self._h5_file = None
+        # Parameters were written with the objects by `append`
+        self._appended_parameters = False
 
     def __call__(self, format):
         options={
-            "h5":self._save_h5
+            "h5":self._save_h5,
+            "npy":self._save_npy,
         }
-        if format not in options.keys(): 
+        if format not in options.keys():
             raise NotImplementedError
 
         options[format]()
-        self._save_parameters()
\ No newline at end of file
+        self._save_parameters()
+
+
+class ThreadedSave:
+    """
+    Incremental save on a dedicated writer thread.
+    Objects passed to `append` go through a bounded queue to the thread that writes them with `Save.append`,
+    so generating the next objects overlaps with writing the previous ones.
+    `append` only blocks when the queue is full.
+
+    Args:
+        save (Save): Save used to write the objects
+        queue_size (int, optional): Number of appends that can wait to be written. Defaults to 4.
+    """
+    def __init__(self, save, queue_size=4) -> None:
+        self.save = save
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.error = None
+
+        self.thread = threading.Thread(target=self._write, daemon=True)
+        self.thread.start()
+
+    def _write(self):
+        while True:
+            chunk = self.queue.get()
+            if chunk is None:
+                break
+            if self.error is not None:
+                # Keep draining so the generating thread is never blocked on a dead writer
+                continue
+            try:
+                self.save.append(*chunk)
+            except Exception as error:
+                self.error = error
+
+    def _raise_error(self):
+        if self.error is not None:
+            raise RuntimeError("Writing the dataset failed") from self.error
+
+    def append(self, objects:list, params:dict=None):
+        """
+        Queue objects to be appended to the h5 file, see `Save.append`.
+
+        Args:
+            objects (list[np.ndarray]): objects to write, all of the same shape
+            params (dict, optional): parameters of the objects, by object index, written along with them. Defaults to None.
+        """
+        self._raise_error()
+        self.queue.put((objects, params))
+
+    def close(self):
+        """
+        Wait for every queued object to be written, then finish the save, see `Save.close`.
+        """
+        self.queue.put(None)
+        self.thread.join()
+        if self.error is not None:
+            self.save._close_h5()
+            self._raise_error()
+        self.save.close()
+
+    def abort(self):
+        """
+        Stop the writer thread once the queued objects are written, and close the h5 file without writing the parameters, see `Save.abort`.
+        """
+        self.queue.put(None)
+        self.thread.join()
+        self.save.abort()
+
+
+def _clean_value(value):
+    """
+    Convert NumPy values to Python types yaml can represent, including inside nested parameters
+    """
+    if isinstance(value, dict):
+        return {key: _clean_value(entry) for key, entry in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_clean_value(entry) for entry in value]
+    if "tolist" in dir(value):
+        return value.tolist()
+    return value
+
+
+def _quantize(objects):
+    """
+    Rescale each object of a stack to the 0-255 range of uint8
+
+    Returns:
+        tuple(np.ndarray, np.ndarray, np.ndarray): quantized objects, and the scale and offset of each object such that object ~ quantized * scale + offset
+    """
+    objects = np.asarray(objects, dtype=np.float64)
+    axes = tuple(range(1, objects.ndim))
+    offset = objects.min(axis=axes)
+    scale = (objects.max(axis=axes) - offset) / 255
+    scale[scale == 0] = 1.0
+
+    per_object = (slice(None),) + (np.newaxis,) * len(axes)
+    quantized = np.rint((objects - offset[per_object]) / scale[per_object]).astype(np.uint8)
+    return quantized, scale, offset
+
+
+def _flatten_parameters(params, prefix=""):
+    flat_params = {}
+    for key, value in params.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict) and len(value) > 0:
+            flat_params.update(_flatten_parameters(value, f"{name}/"))
+        else:
+            flat_params[name] = value.tolist() if "tolist" in dir(value) else value
+    return flat_params
+
+
+def _typed_array(values):
+    """
+    Values as an array if they are numbers, booleans or strings (including fixed size lists of them), else None
+    """
+    try:
+        array = np.asarray(values)
+    except ValueError:
+        return None
+    return array if array.dtype.kind in "biufU" else None
+
+
+def _append_h5_parameters(group, params):
+    """
+    Append the parameters of a chunk of objects, by object index, to the resizable `index` and `columns/<name>` datasets of `group`.
+    Every chunk must have the same parameters.
+    """
+    indices = list(params.keys())
+    flat_params = [_flatten_parameters(params[index]) for index in indices]
+    names = list(dict.fromkeys(name for object_params in flat_params for name in object_params))
+
+    if "index" in group and set(names) != set(_group_names(group, "columns")):
+        raise ValueError("Every chunk of objects must have the same parameters.")
+
+    _append_column(group, "index", np.asarray(indices, dtype=np.int64))
+    for name in names:
+        _append_column(
+            group, f"columns/{name}", [object_params.get(name) for object_params in flat_params]
+        )
+
+
+def _append_column(group, name, values):
+    """
+    Append one value per object to a column, created resizable on the first chunk.
+    The first chunk sets the type of the column: a typed array, strings, or yaml strings if the values cannot be typed.
+    """
+    array = _typed_array(values)
+    if name in group:
+        dataset = group[name]
+        encoded = dataset.attrs.get("encoding") == "yaml"
+        strings = h5py.check_string_dtype(dataset.dtype) is not None
+    else:
+        dataset = None
+        encoded = array is None
+        strings = encoded or array.dtype.kind == "U"
+
+    if encoded:
+        data = np.array([yaml.safe_dump(value) for value in values], dtype=object)
+    elif array is None or (array.dtype.kind == "U") != strings:
+        raise ValueError(f"Parameter {name} changed type between chunks of objects.")
+    elif strings:
+        data = array.astype(object)
+    else:
+        data = array
+
+    if dataset is None:
+        dataset = group.create_dataset(
+            name,
+            data=data,
+            dtype=h5py.string_dtype() if strings else data.dtype,
+            maxshape=(None, *data.shape[1:]),
+            chunks=True,
+        )
+        if encoded:
+            dataset.attrs["encoding"] = "yaml"
+        return
+
+    if data.shape[1:] != dataset.shape[1:] or not (
+        strings or np.can_cast(data.dtype, dataset.dtype, "same_kind")
+    ):
+        raise ValueError(f"Parameter {name} changed type or shape between chunks of objects.")
+    start = dataset.shape[0]
+    dataset.resize(start + len(data), axis=0)
+    dataset[start:] = data
+
+
+def _collect_constants(group):
+    """
+    Move the columns of `group` with the same value for every object to `constants`, stored once
+    """
+    for name in _group_names(group, "columns"):
+        column = group[f"columns/{name}"]
+        first = column[:1]
+        if not all(
+            (column[start : start + _PARAMETER_ROWS] == first).all()
+            for start in range(0, column.shape[0], _PARAMETER_ROWS)
+        ):
+            continue
+
+        strings = h5py.check_string_dtype(column.dtype) is not None
+        constant_column = group.create_dataset(
+            f"constants/{name}",
+            data=column.asstr()[0] if strings else column[0],
+            dtype=h5py.string_dtype() if strings else column.dtype,
+        )
+        constant_column.attrs.update(column.attrs)
+        del group[f"columns/{name}"]
+
+
+def _write_column(group, name, values, per_object):
+    """
+    Write one parameter as a typed dataset, or as yaml strings if it cannot be typed (None, ragged lists, empty dicts).
+    `per_object` values are a list with one entry per object.
+    """
+    array = _typed_array(values)
+
+    if array is None:
+        encoded = (
+            [yaml.safe_dump(value) for value in values]
+            if per_object
+            else yaml.safe_dump(values)
+        )
+        dataset = group.create_dataset(name, data=encoded, dtype=h5py.string_dtype())
+        dataset.attrs["encoding"] = "yaml"
+    elif array.dtype.kind == "U":
+        dataset = group.create_dataset(name, data=array.astype(object), dtype=h5py.string_dtype())
+    else:
+        dataset = group.create_dataset(name, data=array)
+
+    return dataset
+
+
+def _read_column(dataset):
+    if dataset.attrs.get("encoding") == "yaml":
+        values = dataset.asstr()[()]
+        return (
+            [yaml.safe_load(value) for value in values]
+            if dataset.ndim > 0
+            else yaml.safe_load(values)
+        )
+    if h5py.check_string_dtype(dataset.dtype) is not None:
+        return dataset.asstr()[()]
+    return dataset[()]
+
+
+def load_parameters(file_path, columns=None):
+    """
+    Read parameters saved in the h5 (columnar) format.
+    Nested parameters are named by their path, e.g. `star/object/center_x` for sky and shape images.
+
+    Args:
+        file_path (str): Path to the h5 file written by `Save`
+        columns (list[str], optional): Names of the parameters to read. Defaults to None (all of them).
+
+    Returns:
+        dict: parameter name to value. Parameters that vary between objects are arrays with one entry per object,
+        in the order of the object indices stored under `index`. Constant parameters are returned as their single value.
+
+    Examples:
+        >>> params = load_parameters("dataset/dataset.h5", columns=["seed", "time"])
+    """
+    params = {}
+    with h5py.File(file_path, 'r') as f:
+        group = f["parameters"]
+
+        for kind in ["constants", "columns"]:
+            if kind not in group:
+                continue
+
+            def read(name, node):
+                if isinstance(node, h5py.Dataset) and (columns is None or name in columns):
+                    params[name] = _read_column(node)
+
+            group[kind].visititems(read)
+
+        if columns is None or "index" in columns:
+            params["index"] = group["index"][()]
+
+    return params
+
+
+def merge_shards(save_path):
+    """
+    Combine the shards saved by a sharded collection (`dataset_shard<shard_index>.h5` and their parameters)
+    into a single `dataset.h5` and `dataset_parameters.yaml`.
+    The merged `data` is an h5 virtual dataset that points at the shard files, so no objects are copied
+    and the shard files must stay in the same directory as the merged file.
+
+    Args:
+        save_path (str): Directory containing the shards of every job
+    """
+    save_path = save_path.rstrip('/')
+
+    shards = []
+    for shard_path in glob(f"{save_path}/dataset_shard*.h5"):
+        with h5py.File(shard_path, 'r') as f:
+            shards.append({
+                "path": shard_path,
+                "first_index": int(f['data'].attrs['first_index']),
+                "num_shards": int(f['data'].attrs['num_shards']),
+                "dataset_seed": f['data'].attrs.get('dataset_seed'),
+                "data": {
+                    name: (f[name].shape, f[name].dtype)
+                    for name in ['data', 'data_scale', 'data_offset'] if name in f
+                },
+            })
+    shards.sort(key=lambda shard: shard["first_index"])
+
+    assert len(shards) > 0, f"No shards found in {save_path}"
+    num_shards = shards[0]["num_shards"]
+    assert len(shards) == num_shards, f"Found {len(shards)} of {num_shards} shards in {save_path}"
+
+    expected_index = 0
+    for shard in shards:
+        assert shard["first_index"] == expected_index, f"Shards do not cover a contiguous range of objects, missing index {expected_index}"
+        expected_index += shard["data"]["data"][0][0]
+
+    with h5py.File(f"{save_path}/dataset.h5", 'w') as f:
+        for name in shards[0]["data"]:
+            layouts = [shard["data"].get(name) for shard in shards]
+            merged = _merge_virtual_column(f, name, layouts, shards)
+            assert merged, f"Shards have different {name} layouts"
+        if shards[0]["dataset_seed"] is not None:
+            f['data'].attrs['dataset_seed'] = shards[0]["dataset_seed"]
+        _merge_h5_parameters(f, [shard["path"] for shard in shards])
+
+    yaml_shards = sorted(glob(f"{save_path}/dataset_shard*_parameters.yaml"))
+    if len(yaml_shards) > 0:
+        params = {}
+        for shard_path in yaml_shards:
+            with open(shard_path) as f:
+                params.update(yaml.safe_load(f))
+
+        with open(f"{save_path}/dataset_parameters.yaml", 'w') as f:
+            yaml.safe_dump(dict(sorted(params.items())), f)
+
+
+def _merge_h5_parameters(merged_file, shard_paths):
+    """
+    Combine the h5 parameters of the shards (in index order) into the merged file.
+    Typed columns that vary in every shard become virtual datasets over the shards;
+    the (small) remainder is copied: constants shared by all shards are kept once,
+    and constants that differ between shards are expanded into columns.
+    """
+    shards = []
+    for shard_path in shard_paths:
+        with h5py.File(shard_path, 'r') as f:
+            if "parameters" not in f:
+                return
+            group = f["parameters"]
+            shards.append({
+                "path": shard_path,
+                "index": (group["index"].shape, group["index"].dtype),
+                "constants": _group_names(group, "constants"),
+                "columns": {
+                    name: (group[f"columns/{name}"].shape, group[f"columns/{name}"].dtype)
+                    for name in _group_names(group, "columns")
+                },
+            })
+
+    group = merged_file.create_group("parameters")
+    _merge_virtual_column(group, "index", [shard["index"] for shard in shards], shards)
+
+    names = list(dict.fromkeys(
+        name for shard in shards for name in [*shard["constants"], *shard["columns"]]
+    ))
+    for name in names:
+        layouts = [shard["columns"].get(name) for shard in shards]
+        if _merge_virtual_column(group, f"columns/{name}", layouts, shards):
+            continue
+
+        values = [load_parameters(shard["path"], columns=[name])[name] for shard in shards]
+        constant = all(name in shard["constants"] for shard in shards) and all(
+            yaml.safe_dump(_as_list(value)) == yaml.safe_dump(_as_list(values[0]))
+            for value in values
+        )
+
+        if constant:
+            _write_column(group, f"constants/{name}", _as_list(values[0]), per_object=False)
+        else:
+            per_object = []
+            for shard, value in zip(shards, values):
+                per_object.extend(
+                    [_as_list(value)] * shard["index"][0][0]
+                    if name in shard["constants"]
+                    else [_as_list(entry) for entry in value]
+                )
+            _write_column(group, f"columns/{name}", per_object, per_object=True)
+
+
+def _merge_virtual_column(group, column, layouts, shards):
+    """
+    Write `column` as a virtual dataset over the shards, if it is a numeric column of the same type and shape in every shard.
+
+    Args:
+        group (h5py.Group): group of the merged file the column is written to, at the same path as in the shards
+        column (str): dataset name, relative to the group
+        layouts (list[tuple(tuple, np.dtype)]): shape and type of the column in each shard, None if the shard does not have it as a column
+        shards (list[dict]): shard descriptions
+
+    Returns:
+        bool: if the column was written
+    """
+    if not all(
+        layout is not None
+        and layout[1].kind in "biuf"
+        and layout[1] == layouts[0][1]
+        and layout[0][1:] == layouts[0][0][1:]
+        for layout in layouts
+    ):
+        return False
+
+    n_objects = sum(shape[0] for shape, _ in layouts)
+    virtual_layout = h5py.VirtualLayout(shape=(n_objects, *layouts[0][0][1:]), dtype=layouts[0][1])
+    start = 0
+    for shard, (shape, _) in zip(shards, layouts):
+        # Relative source paths are resolved next to the merged file
+        virtual_layout[start : start + shape[0]] = h5py.VirtualSource(
+            os.path.basename(shard["path"]), f"{group.name.rstrip('/')}/{column}", shape=shape
+        )
+        start += shape[0]
+    group.create_virtual_dataset(column, virtual_layout)
+    return True
+
+
+def _group_names(group, kind):
+    names = []
+    if kind in group:
+        group[kind].visititems(
+            lambda name, node: names.append(name) if isinstance(node, h5py.Dataset) else None
+        )
+    return names
+
+
+def _as_list(value):
+    return value.tolist() if "tolist" in dir(value) else value
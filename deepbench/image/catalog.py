@@ -0,0 +1,104 @@
+import itertools
+import os
+from typing import Iterator, Union
+
+import h5py
+import numpy as np
+
+
+def read_catalog(
+    catalog: Union[np.ndarray, dict, str],
+    chunk_size: int = 100_000,
+    key: str = "catalog",
+) -> Iterator[dict]:
+    """
+    Read a source catalog in chunks of rows.
+
+    A catalog is a table with one row per source, and columns such as "type", "center_x", "center_y",
+    "radius", "amplitude", "alpha" or "n". It is either a NumPy structured array, a dict of equal length column arrays,
+    a CSV file with a header row, or an h5 file holding it at `key`, as a compound dataset or as a group of column datasets.
+    Files are read `chunk_size` rows at a time, so catalogs do not need to fit in memory.
+
+    Args:
+        catalog (Union[np.ndarray, dict, str]): The catalog, or the path to a .csv or .h5 file.
+        chunk_size (int, optional): Number of rows per chunk. Defaults to 100_000.
+        key (str, optional): Dataset or group of the catalog in an h5 file. Defaults to "catalog".
+
+    Yields:
+        dict: Column name to the array of values of the rows in the chunk. Text columns are str arrays.
+
+    Examples:
+
+        >>> for chunk in read_catalog("mock_catalog.csv"):
+        ...     print(chunk["center_x"].shape)
+    """
+    if isinstance(catalog, (str, os.PathLike)):
+        extension = os.path.splitext(catalog)[-1]
+        if extension == ".csv":
+            yield from _read_csv(catalog, chunk_size)
+        elif extension in [".h5", ".hdf5"]:
+            yield from _read_h5(catalog, chunk_size, key)
+        else:
+            raise NotImplementedError(
+                f"Catalog format {extension} is not available. Please use .csv or .h5"
+            )
+        return
+
+    if isinstance(catalog, np.ndarray):
+        columns = {name: catalog[name] for name in catalog.dtype.names}
+    else:
+        columns = {name: np.asarray(values) for name, values in catalog.items()}
+
+    n_rows = len(next(iter(columns.values()), []))
+    for start in range(0, n_rows, chunk_size):
+        yield {
+            name: _as_str(values[start : start + chunk_size])
+            for name, values in columns.items()
+        }
+
+
+def _read_csv(path, chunk_size):
+    with open(path) as f:
+        names = [name.strip() for name in f.readline().split(",")]
+        while True:
+            lines = list(itertools.islice(f, chunk_size))
+            if len(lines) == 0:
+                return
+            rows = np.genfromtxt(
+                lines, delimiter=",", names=names, dtype=None, encoding="utf-8", ndmin=1
+            )
+            yield {name: _as_str(rows[name]) for name in names}
+
+
+def _read_h5(path, chunk_size, key):
+    with h5py.File(path, "r") as f:
+        table = f[key]
+        if isinstance(table, h5py.Group):
+            columns = {name: table[name] for name in table.keys()}
+            n_rows = len(next(iter(columns.values())))
+        else:
+            columns = None
+            n_rows = table.shape[0]
+
+        for start in range(0, n_rows, chunk_size):
+            if columns is None:
+                rows = table[start : start + chunk_size]
+                chunk = {name: rows[name] for name in rows.dtype.names}
+            else:
+                chunk = {
+                    name: values[start : start + chunk_size]
+                    for name, values in columns.items()
+                }
+            yield {name: _as_str(values) for name, values in chunk.items()}
+
+
+def _as_str(values):
+    # Text columns come back as bytes from h5 and structured arrays
+    if values.dtype.kind == "S":
+        return np.char.decode(values, "utf-8")
+    if values.dtype.kind == "O":
+        return np.array(
+            [value.decode() if isinstance(value, bytes) else value for value in values],
+            dtype=str,
+        )
+    return values
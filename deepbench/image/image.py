@@ -1,4 +1,5 @@
 from abc import abstractmethod, ABC
+from concurrent.futures import ThreadPoolExecutor
 from typing import Tuple
 from PIL import Image as PILImage
 import os
@@ -34,10 +35,38 @@ class Image(ABC):
     def combine_objects(self, objects, object_params, seed=42):
         raise NotImplementedError
 
-    def generate_noise(self, seed=42):
+    def _render_objects(self, render_block, n_objects, out, threads=1):
+        """
+        Render `n_objects` objects into `out` with `render_block(indices, image)`, which adds the objects at `indices` to `image`.
+        With more than one thread, contiguous blocks of objects are rendered concurrently, each into its own partial image,
+        and the partial images are added to `out` in block order, so the result does not depend on thread scheduling.
+        """
+        threads = min(threads, n_objects)
+        if threads <= 1:
+            render_block(range(n_objects), out)
+            return out
+
+        def render(block):
+            partial = np.zeros_like(out)
+            render_block(block, partial)
+            return partial
+
+        blocks = [
+            range(n_objects * block // threads, n_objects * (block + 1) // threads)
+            for block in range(threads)
+        ]
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            for partial in executor.map(render, blocks):
+                out += partial
+        return out
+
+    def generate_noise(self, seed=42, shape=None):
         """
         Add noise to an image
 
+        Args:
+            seed (int, optional): random seed for the noise. Defaults to 42.
+            shape (tuple, optional): Shape of the noise, e.g. of a tile of the image. Defaults to None (the shape of the image).
         """
         noise_map = {
             "gaussian": self._generate_gaussian_noise,
@@ -47,9 +76,45 @@ class Image(ABC):
         if self.object_noise_type not in noise_map.keys():
             raise NotImplementedError(f"{self.object_noise_type} noise not available")
 
-        noise = noise_map[self.object_noise_type](seed)
+        noise = noise_map[self.object_noise_type](seed, shape)
         return noise
 
+    def generate_noise_batch(self, seeds, out=None, dtype="float64"):
+        """
+        Generate the noise of a batch of images in one call, image `i` from its own generator seeded with `seeds[i]`.
+        In float64, image `i` is the same as `generate_noise(seeds[i])`.
+
+        Args:
+            seeds (list): Seed (int or np.random.SeedSequence) of each image
+            out (ndarray, optional): Buffer of shape (len(seeds), *image_shape) the noise is written to. Defaults to None (a new array).
+            dtype (str, optional): "float64" or "float32". Gaussian noise is drawn directly in float32, which is faster. Defaults to "float64".
+
+        Returns:
+            ndarray: (len(seeds), *image_shape) noise
+
+        Examples:
+            >>> noise = image.generate_noise_batch(range(64), dtype="float32")
+        """
+        if self.object_noise_type not in ["gaussian", "poisson"]:
+            raise NotImplementedError(f"{self.object_noise_type} noise not available")
+
+        shape = (len(seeds), *self.image_shape)
+        if out is None:
+            out = np.empty(shape, dtype=dtype)
+        assert out.shape == shape, f"Noise buffer must be of shape {shape}."
+
+        for noise, seed in zip(out, seeds):
+            rng = np.random.default_rng(seed=seed)
+            if self.object_noise_type == "gaussian" and noise.flags.c_contiguous:
+                rng.standard_normal(dtype=noise.dtype, out=noise)
+                noise *= self.object_noise_level
+            elif self.object_noise_type == "gaussian":
+                noise[...] = rng.standard_normal(size=noise.shape, dtype=noise.dtype)
+                noise *= self.object_noise_level
+            else:
+                noise[...] = rng.poisson(lam=self.object_noise_level, size=noise.shape)
+        return out
+
     def save_image(self, save_dir="results", image_name="image_1", image_format="jpg"):
         """
         Save the generated image into the specified directory.
@@ -74,12 +139,14 @@ class Image(ABC):
 
         image.save(save_path)
 
-    def _generate_gaussian_noise(self, seed=42):
+    def _generate_gaussian_noise(self, seed=42, shape=None):
         return np.random.default_rng(seed=seed).normal(
-            scale=self.object_noise_level, size=self.image_shape
+            scale=self.object_noise_level,
+            size=self.image_shape if shape is None else shape,
         )
 
-    def _generate_poisson_noise(self, seed=42):
+    def _generate_poisson_noise(self, seed=42, shape=None):
         return np.random.default_rng(seed=seed).poisson(
-            lam=self.object_noise_level, size=self.image.shape
+            lam=self.object_noise_level,
+            size=self.image.shape if shape is None else shape,
         )
@@ -12,6 +12,7 @@ class ShapeImage(Image):
         image_shape (Tuple[int, int]): Dimensions of the shape image.
         object_noise_type (str, optional): Noise distribution applied to image. Defaults to "gaussian".
         object_noise_level (float, optional): Relative noise level (scale 0 to 1). Defaults to 0.0.
+        threads (int, optional): Number of threads drawing the shapes of an image concurrently, each into its own partial image. Defaults to 1.
 
     """
 
@@ -20,9 +21,11 @@ class ShapeImage(Image):
         image_shape: Tuple[int, int],
         object_noise_type: str = "gaussian",
         object_noise_level: float = 0.0,
+        threads: int = 1,
     ):
 
         self.shapes = ShapeGenerator(image_shape=image_shape)
+        self.threads = threads
         self.method_map = self._get_methods()
         super().__init__(
             image_shape=image_shape,
@@ -42,13 +45,18 @@ class ShapeImage(Image):
 
         return {method[0].split("_")[-1]: method[1] for method in methods}
 
-    def _create_object(self, shape, shape_params):
+    def _create_object(self, shape, shape_params, out=None, shapes=None):
 
         if shape not in self.method_map.keys():
             raise NotImplementedError()
-        return self.method_map[shape](self.shapes, **shape_params)
+        # Threads each draw with their own generator
+        shapes = self.shapes if shapes is None else shapes
+        # With `out`, the shape is drawn directly into it, without a temporary image
+        return self.method_map[shape](shapes, **shape_params, out=out)
 
-    def combine_objects(self, objects, object_params, instance_params=None, seed=42):
+    def combine_objects(
+        self, objects, object_params, instance_params=None, seed=42, out=None
+    ):
         """
         Utilize Image._generate_astro_objects to overlay all selected astro objects into one image
         If object parameters are not included in object list, defaults are used.
@@ -65,22 +73,37 @@ class ShapeImage(Image):
             objects (list): str discriptors of the included object
             object_params (list): Parameters of each object (ie, position in frame)
             seed (int, optional): random seed for noise. Defaults to 42.
+            out (ndarray, optional): Array of the image shape the image is written to, overwriting its contents. Defaults to None (a new array).
 
         Returns:
             ndarray : image with objects and noise
 
         """
-        image = self.shapes.create_empty_shape()
+        if out is None:
+            image = self.shapes.create_empty_shape()
+        else:
+            image = out
+            image[...] = 0
 
         if type(objects) == str:
             objects = [objects]
 
         if type(object_params) == dict:
             object_params = [object_params]
-            
-        for shape, params in zip(objects, object_params):
-            image += self._create_object(shape, params)
-     
-        noise = self.generate_noise(seed)
-        image += noise
+
+        sources = list(zip(objects, object_params))
+
+        def render_block(indices, block_image):
+            shapes = (
+                self.shapes
+                if block_image is image
+                else ShapeGenerator(image_shape=self.image_shape)
+            )
+            for index in indices:
+                shape, params = sources[index]
+                self._create_object(shape, params, out=block_image, shapes=shapes)
+
+        self._render_objects(render_block, len(sources), image, self.threads)
+
+        image += self.generate_noise(seed)
         return image
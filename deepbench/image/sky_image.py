@@ -1,6 +1,14 @@
-from typing import Union
+import inspect
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple, Union
 from deepbench.image.image import Image
+from deepbench.image.catalog import read_catalog
 from deepbench import astro_object
+from deepbench.astro_object.astro_object import _PIXELS_PER_CHUNK
+from deepbench.astro_object.psf import convolve_psf, convolve_varying_psf, psf_radius
+from deepbench.astro_object.sersic import sersic_batch
+import h5py
 import numpy as np
 
 
@@ -11,6 +19,10 @@ class SkyImage(Image):
         object_noise_level=0,
         object_noise_type="gaussian",
         scale=True,
+        stamp_truncation=None,
+        shared_psf=False,
+        psf=None,
+        threads=1,
     ):
         """
         Create an image that is a composition of multiple astronomy objects
@@ -20,18 +32,42 @@ class SkyImage(Image):
             object_noise_level (int, optional): Level of noise added to the full image. Defaults to 0.
             object_noise_type (str, optional): Type of noise added. Defaults to "gaussian".
             scale (bool, optional): Scale objects between 0 and 1 before adding to the composition
+            stamp_truncation (float, optional): Render each object only on a stamp around its center, where its profile is above this fraction of its amplitude (e.g. 1e-3).
+                The noise of each object is then only drawn inside its stamp, and objects are scaled to their peak over a zero background.
+                Defaults to None (every object is rendered on the full frame).
+            shared_psf (bool, optional): Convolve the composition with the PSF once, instead of convolving each object.
+                Objects (and their noise) are then scaled before the PSF is applied. Defaults to False.
+            psf (dict, optional): PSF applied to the objects, as the arguments of `AstroObject.set_psf`,
+                e.g. {"kernel": "moffat", "method": "fft", "gamma": 2.0, "alpha": 3.0}. Defaults to None (a gaussian of width 0.7).
+                With `shared_psf`, kernel parameters can also be 2D grids of values over the field,
+                e.g. {"kernel": "gaussian", "sigma": [[0.7, 1.0], [1.0, 2.0]]}, see `deepbench.astro_object.psf.convolve_varying_psf`.
+            threads (int, optional): Number of threads rendering the objects of an image concurrently, each into its own partial image.
+                Results equal the single thread image up to floating point rounding. Defaults to 1.
 
         """
         self.scale = scale
+        self.stamp_truncation = stamp_truncation
+        self.shared_psf = shared_psf
+        self.psf = psf if psf is not None else {}
+        self.threads = threads
+        self._varying_psf = any(
+            np.ndim(value) > 0
+            for name, value in self.psf.items()
+            if name not in ["kernel", "method"]
+        )
+        assert (
+            shared_psf or not self._varying_psf
+        ), "A PSF varying over the field is applied to the whole image, and requires shared_psf."
         assert len(image_shape) >= 2, "Image must be 2D or higher."
         super().__init__(image_shape, object_noise_type, object_noise_level)
 
-    def _generate_astro_object(self, object_type, object_parameters):
+    def _astro_object_class(self, object_type):
 
         astro_object_map = {
             "star": astro_object.star_object.StarObject,
             "galaxy": astro_object.galaxy_object.GalaxyObject,
             "spiral_galaxy": astro_object.spiral_galaxy.SpiralGalaxyObject,
+            "star_field": astro_object.star_field.StarFieldObject,
         }
 
         if object_type not in astro_object_map.keys():
@@ -40,25 +76,61 @@ class SkyImage(Image):
                 f"Please select object from {astro_object_map.keys()}"
             )
 
-        return astro_object_map[object_type](**object_parameters)
+        return astro_object_map[object_type]
+
+    def _generate_astro_object(self, object_type, object_parameters):
+        return self._astro_object_class(object_type)(**object_parameters)
 
     def _scale(self, input_image):
         image = input_image.copy()
         image = (image - input_image.min()) / (input_image.max() - input_image.min())
         return image
 
+    def _add_object(self, sky_object, object_params, out):
+        """
+        Render one astro object and add it to `out` in place, on its stamp or on the full frame
+        """
+        if self.stamp_truncation is not None:
+            object_image, (rows, columns) = sky_object.create_stamp(
+                self.stamp_truncation, psf=not self.shared_psf, **object_params
+            )
+            if object_image.size == 0:
+                return
+            full_frame = object_image.shape == tuple(self.image_shape[:2])
+        elif self.shared_psf:
+            object_image = sky_object.create_unconvolved_object(**object_params)
+            rows, columns = slice(None), slice(None)
+            full_frame = True
+        else:
+            object_image = sky_object.create_object(**object_params)
+            rows, columns = slice(None), slice(None)
+            full_frame = True
+
+        if self.scale:
+            # Outside of a stamp the object is taken as 0
+            low = object_image.min() if full_frame else min(object_image.min(), 0)
+            high = object_image.max()
+            object_image = object_image - low
+            object_image /= high - low
+
+        out[rows, columns] += object_image
+
     def combine_objects(
         self,
         objects: Union[list, str],
         instance_params: Union[list, dict],
         object_params: Union[list, dict],
         seed: int = 42,
+        out: np.ndarray = None,
     ):
         """
         Utilize Image._generate_astro_objects to overlay all selected astro objects into one image
         If object parameters are not included in object list, defaults are used.
         Updates SkyImage.image.
 
+        Each object is added to a single output image as soon as it is rendered,
+        so memory does not grow with the number of objects.
+
         Current input parameter assumptions (totally up to change):
         For a single image:
         [{
@@ -70,13 +142,17 @@ class SkyImage(Image):
             objects (list): str discriptors of the included object
             instance_params (list): Parameters for the instance of the object (ei, overall noise)
             object_params (list): Parameters of each object (ei: position in frame)
-            seed (int, optional): random seed for noise. Defaults to 42.
+            seed (int, optional): random seed for the image noise, and for the noise of objects that do not set their own seed. Defaults to 42.
+            out (ndarray, optional): Array of the image shape the image is written to, overwriting its contents. Defaults to None (a new array).
 
         Returns:
             ndarray : image with objects and noise
 
         """
-        object_images = []
+        if out is None:
+            out = np.zeros(self.image_shape)
+        else:
+            out[...] = 0
 
         if type(objects) == str:
             objects = [objects]
@@ -85,25 +161,433 @@ class SkyImage(Image):
         if type(object_params) == dict:
             object_params = [object_params]
 
-        for sky_object, sky_params, object in zip(
-            objects, instance_params, object_params
-        ):
-            import matplotlib.pyplot as plt
+        # Objects without their own seed draw their noise from independent
+        # streams spawned from the image seed
+        object_seeds = np.random.SeedSequence(seed).spawn(len(objects))
 
+        sources = list(zip(objects, instance_params, object_params, object_seeds))
+        for _, sky_params, _, _ in sources:
             sky_params["image_dimensions"] = self.image_shape
             if "noise_level" not in sky_params:
                 sky_params["noise_level"] = 0
 
-            additional_sky_object = self._generate_astro_object(sky_object, sky_params)
+        def render_block(indices, image):
+            for index in indices:
+                sky_object, sky_params, object, object_seed = sources[index]
+                additional_sky_object = self._generate_astro_object(
+                    sky_object,
+                    {"seed": int(object_seed.generate_state(1)[0]), **sky_params},
+                )
+                if not self.shared_psf:
+                    additional_sky_object.set_psf(**self.psf)
+                self._add_object(additional_sky_object, object, image)
 
-            object_image = additional_sky_object.create_object(**object)
-            if self.scale:
-                object_image = self._scale(object_image)
+        self._render_objects(render_block, len(sources), out, self.threads)
 
-            object_images.append(object_image)
+        if self.shared_psf:
+            # The convolution is linear, so convolving the sum is convolving each object
+            self._convolve_psf(out)
 
-        noise = self.generate_noise(seed)
-        object_images.append(noise)
-        image = np.sum(object_images, axis=0)
+        out += self.generate_noise(seed)
 
-        return image
+        return out
+
+    def _convolve_psf(self, out):
+        if self._varying_psf:
+            kernel_params = {
+                name: value for name, value in self.psf.items() if name != "method"
+            }
+            out[...] = convolve_varying_psf(out, **kernel_params)
+        else:
+            out[...] = convolve_psf(out, **self.psf)
+
+    def render_catalog(
+        self,
+        catalog: Union[np.ndarray, dict, str],
+        chunk_size: int = 100_000,
+        seed: int = 42,
+        out: np.ndarray = None,
+        key: str = "catalog",
+    ):
+        """
+        Render every source of a catalog into one image, reading and rendering the catalog in chunks of rows.
+
+        The catalog has one row per source, with a "type" column ("star", "galaxy" or "spiral_galaxy", defaults to stars),
+        "center_x" and "center_y", and optionally any parameter of the object type, e.g. "radius", "amplitude", "alpha" for stars,
+        or "n", "ellipse", "theta" for galaxies. Missing parameters take the defaults of the object type.
+        Stars are rendered together with `StarFieldObject`, and galaxies each on their own stamp, truncated at `stamp_truncation` (1e-3 if not set),
+        with the stamps of a chunk evaluated in batches by `sersic_batch`.
+        Spiral galaxies are rendered on the full image, around their center ("center" placement of `SpiralGalaxyObject`).
+
+        Catalog amplitudes are kept as they are (objects are not scaled) and objects have no noise of their own.
+        The PSF is applied once to the whole image, followed by the noise of the image.
+
+        Args:
+            catalog (Union[np.ndarray, dict, str]): Structured array, dict of columns, or path to a .csv or .h5 catalog, see `deepbench.image.catalog.read_catalog`.
+            chunk_size (int, optional): Number of catalog rows read and rendered at once. Defaults to 100_000.
+            seed (int, optional): random seed for the image noise. Defaults to 42.
+            out (ndarray, optional): Array of the image shape the image is written to, overwriting its contents. Defaults to None (a new array).
+            key (str, optional): Dataset or group of the catalog in an h5 file. Defaults to "catalog".
+
+        Returns:
+            ndarray : image of the catalog
+
+        Examples:
+
+            >>> catalog = np.zeros(3, dtype=[("type", "U6"), ("center_x", float), ("center_y", float), ("radius", float)])
+            >>> image = SkyImage((256, 256)).render_catalog(catalog)
+            >>> image = SkyImage((8192, 8192)).render_catalog("mock_catalog.csv")
+        """
+        if out is None:
+            out = np.zeros(self.image_shape)
+        else:
+            out[...] = 0
+
+        truncation = 1e-3 if self.stamp_truncation is None else self.stamp_truncation
+        stars = astro_object.star_field.StarFieldObject(self.image_shape)
+
+        for chunk in read_catalog(catalog, chunk_size=chunk_size, key=key):
+            n_rows = len(chunk["center_x"])
+            object_types = chunk.get("type", np.full(n_rows, "star"))
+
+            for object_type in np.unique(object_types):
+                selected = object_types == object_type
+                columns = {
+                    name: values[selected]
+                    for name, values in chunk.items()
+                    if name != "type"
+                }
+                if object_type == "star":
+                    stars.create_star_field(
+                        truncation=truncation, out=out, **self._star_columns(columns)
+                    )
+                elif object_type == "galaxy":
+                    self._add_catalog_galaxies(columns, truncation, out)
+                else:
+                    self._add_catalog_objects(object_type, columns, truncation, out)
+
+        self._convolve_psf(out)
+        if self.object_noise_level:
+            out += self.generate_noise(seed)
+        return out
+
+    def _star_columns(self, columns):
+        names = ["center_x", "center_y", "amplitude", "radius", "alpha"]
+        return {name: columns[name] for name in names if name in columns}
+
+    def _add_catalog_galaxies(self, columns, truncation, out):
+        """
+        Render catalog galaxies on the stamps of `GalaxyObject.create_stamp`, evaluating stamps of the same shape together, and add them to `out`
+        """
+        galaxy_class = astro_object.galaxy_object.GalaxyObject
+        defaults = inspect.signature(galaxy_class.__init__).parameters
+        n_galaxies = len(columns["center_x"])
+        amplitude, radius, n, ellipse, theta = (
+            np.broadcast_to(
+                columns.get(name, defaults[name].default), (n_galaxies,)
+            ).astype(float)
+            for name in ["amplitude", "radius", "n", "ellipse", "theta"]
+        )
+        center_x, center_y = columns["center_x"], columns["center_y"]
+
+        # The stamp radius formula holds for arrays of parameters
+        extent = galaxy_class(
+            image_dimensions=(1, 1), radius=radius, n=n, noise_level=0
+        ).stamp_radius(truncation)
+        height, width = self.image_shape[:2]
+        first_row = np.clip(np.floor(center_y - extent), 0, height).astype(np.int64)
+        last_row = np.clip(np.ceil(center_y + extent) + 1, 0, height).astype(np.int64)
+        first_column = np.clip(np.floor(center_x - extent), 0, width).astype(np.int64)
+        last_column = np.clip(np.ceil(center_x + extent) + 1, 0, width).astype(np.int64)
+
+        stamp_shapes = np.stack(
+            [last_row - first_row, last_column - first_column], axis=1
+        )
+        galaxies = np.flatnonzero((stamp_shapes > 0).all(axis=1))
+        shapes, group = np.unique(stamp_shapes[galaxies], axis=0, return_inverse=True)
+
+        for index, (stamp_height, stamp_width) in enumerate(shapes):
+            members = galaxies[group.ravel() == index]
+            batch_size = max(1, _PIXELS_PER_CHUNK // (stamp_height * stamp_width))
+            for start in range(0, members.size, batch_size):
+                batch = members[start : start + batch_size]
+                stamps = sersic_batch(
+                    (stamp_height, stamp_width),
+                    center_x=center_x[batch] - first_column[batch],
+                    center_y=center_y[batch] - first_row[batch],
+                    amplitude=amplitude[batch],
+                    r_eff=radius[batch],
+                    n=n[batch],
+                    ellip=ellipse[batch],
+                    theta=theta[batch],
+                )
+                for galaxy, stamp in zip(batch, stamps):
+                    out[
+                        first_row[galaxy] : last_row[galaxy],
+                        first_column[galaxy] : last_column[galaxy],
+                    ] += stamp
+
+    def _add_catalog_objects(self, object_type, columns, truncation, out):
+        """
+        Render catalog rows of one object type on their own stamps, and add them to `out`
+        """
+        object_class = self._astro_object_class(object_type)
+        init_names = [
+            name
+            for name in inspect.signature(object_class.__init__).parameters
+            if name in columns and name not in ["image_dimensions", "noise_level"]
+        ]
+        object_names = [
+            name
+            for name in inspect.signature(object_class.create_object).parameters
+            if name in columns
+        ]
+
+        # Sources are placed at their catalog center, so tiles of a mosaic render the same spirals as the full image
+        placement = {"placement": "center"} if object_type == "spiral_galaxy" else {}
+
+        for row in range(len(columns["center_x"])):
+            sky_object = object_class(
+                image_dimensions=self.image_shape,
+                noise_level=0,
+                **placement,
+                **{name: columns[name][row].item() for name in init_names},
+            )
+            stamp, (stamp_rows, stamp_columns) = sky_object.create_stamp(
+                truncation,
+                psf=False,
+                **{name: columns[name][row].item() for name in object_names},
+            )
+            out[stamp_rows, stamp_columns] += stamp
+
+    def _source_extent(self, object_type, columns, truncation):
+        """
+        Stamp radius of each catalog source of one object type, infinite for objects rendered on the full frame
+        """
+        object_class = self._astro_object_class(object_type)
+        init_names = [
+            name
+            for name in inspect.signature(object_class.__init__).parameters
+            if name in columns and name not in ["image_dimensions", "noise_level"]
+        ]
+        object_names = [
+            name
+            for name in inspect.signature(object_class.stamp_radius).parameters
+            if name in columns
+        ]
+        # The stamp radius formulas hold for arrays of parameters
+        sources = object_class(
+            image_dimensions=(1, 1),
+            noise_level=0,
+            **{name: columns[name] for name in init_names},
+        )
+        extent = sources.stamp_radius(
+            truncation, **{name: columns[name] for name in object_names}
+        )
+        if extent is None:
+            return np.full(len(columns["center_x"]), np.inf)
+        return np.broadcast_to(np.ceil(extent), (len(columns["center_x"]),))
+
+    def _route_sources(self, catalog, tile_shape, halo, truncation):
+        """
+        Indices of the catalog sources whose stamp touches each tile, padded by `halo`, as a dict of (tile row, tile column) to indices
+        """
+        height, width = self.image_shape[:2]
+        n_tiles = (-(-height // tile_shape[0]), -(-width // tile_shape[1]))
+        n_sources = len(catalog["center_x"])
+
+        object_types = catalog.get("type", np.full(n_sources, "star"))
+        extent = np.zeros(n_sources)
+        for object_type in np.unique(object_types):
+            selected = object_types == object_type
+            columns = {name: values[selected] for name, values in catalog.items()}
+            extent[selected] = self._source_extent(object_type, columns, truncation)
+        extent = np.minimum(extent, height + width) + halo
+
+        center_x, center_y = catalog["center_x"], catalog["center_y"]
+        visible = (
+            (center_y + extent >= 0)
+            & (center_y - extent < height)
+            & (center_x + extent >= 0)
+            & (center_x - extent < width)
+        )
+        sources = np.flatnonzero(visible)
+
+        def tile_range(center, size, n):
+            first = np.clip(np.floor((center - extent[sources]) / size), 0, n - 1)
+            last = np.clip(np.floor((center + extent[sources]) / size), 0, n - 1)
+            return first.astype(np.int64), (last - first + 1).astype(np.int64)
+
+        first_row, n_rows = tile_range(center_y[sources], tile_shape[0], n_tiles[0])
+        first_column, n_columns = tile_range(
+            center_x[sources], tile_shape[1], n_tiles[1]
+        )
+
+        # Expand each source into every tile of its block of tiles
+        n_source_tiles = n_rows * n_columns
+        source = np.repeat(np.arange(sources.size), n_source_tiles)
+        block_start = np.repeat(
+            np.cumsum(n_source_tiles) - n_source_tiles, n_source_tiles
+        )
+        position = np.arange(source.size) - block_start
+        tile_row = first_row[source] + position // n_columns[source]
+        tile_column = first_column[source] + position % n_columns[source]
+
+        tile = tile_row * n_tiles[1] + tile_column
+        order = np.argsort(tile, kind="stable")
+        tile_sources = np.split(
+            sources[source[order]],
+            np.cumsum(np.bincount(tile, minlength=n_tiles[0] * n_tiles[1]))[:-1],
+        )
+        return {
+            (index // n_tiles[1], index % n_tiles[1]): tile_sources[index]
+            for index in range(n_tiles[0] * n_tiles[1])
+        }
+
+    def _render_tile(self, catalog, sources, tile_rows, tile_columns, halo, seed):
+        """
+        Render the sources of one tile on the tile padded by `halo` (within the image), and return the tile without its padding
+        """
+        height, width = self.image_shape[:2]
+        padded_rows = slice(
+            max(tile_rows.start - halo, 0), min(tile_rows.stop + halo, height)
+        )
+        padded_columns = slice(
+            max(tile_columns.start - halo, 0), min(tile_columns.stop + halo, width)
+        )
+
+        tile_sky = SkyImage(
+            (
+                padded_rows.stop - padded_rows.start,
+                padded_columns.stop - padded_columns.start,
+            ),
+            object_noise_level=0,
+            stamp_truncation=self.stamp_truncation,
+            shared_psf=True,
+            psf=self.psf,
+        )
+        tile_catalog = {name: values[sources] for name, values in catalog.items()}
+        tile_catalog["center_x"] = tile_catalog["center_x"] - padded_columns.start
+        tile_catalog["center_y"] = tile_catalog["center_y"] - padded_rows.start
+        tile = tile_sky.render_catalog(tile_catalog, chunk_size=max(sources.size, 1))
+
+        tile = tile[
+            tile_rows.start - padded_rows.start : tile_rows.stop - padded_rows.start,
+            tile_columns.start
+            - padded_columns.start : tile_columns.stop
+            - padded_columns.start,
+        ]
+        if self.object_noise_level:
+            tile += self.generate_noise(seed, shape=tile.shape)
+        return tile
+
+    def render_mosaic(
+        self,
+        catalog: Union[np.ndarray, dict, str],
+        save_path: str,
+        tile_shape: Tuple[int, int] = (2048, 2048),
+        format: str = "npy",
+        dtype: str = "float32",
+        workers: int = 1,
+        seed: int = 42,
+        name: str = "mosaic",
+        key: str = "catalog",
+    ) -> str:
+        """
+        Render a catalog into an image too large for memory, tile by tile, written straight to a memory mapped `.npy` file or a chunked h5 dataset.
+
+        Each source is routed to the tiles its stamp touches. Every tile is rendered with `render_catalog` on the tile padded
+        by the PSF radius (the halo), so sources and PSF wings crossing tile edges are the same as in a single image.
+        Each tile gets its own noise, from a seed spawned from `seed` and the tile index.
+        The catalog itself is read in memory; only the image is tiled. PSFs varying over the field are not supported.
+
+        Args:
+            catalog (Union[np.ndarray, dict, str]): Structured array, dict of columns, or path to a .csv or .h5 catalog, see `render_catalog`.
+            save_path (str): Directory the mosaic is written to, created if it does not exist.
+            tile_shape (Tuple[int, int], optional): Shape of the tiles, and of the h5 chunks. Defaults to (2048, 2048).
+            format (str, optional): "npy" or "h5". Defaults to "npy".
+            dtype (str, optional): Data type of the written image. Defaults to "float32".
+            workers (int, optional): Number of threads rendering tiles at the same time. Defaults to 1.
+            seed (int, optional): random seed for the image noise. Defaults to 42.
+            name (str, optional): Base name of the output file, whose h5 dataset is "data". Defaults to "mosaic".
+            key (str, optional): Dataset or group of the catalog in an h5 file. Defaults to "catalog".
+
+        Returns:
+            str: Path of the written mosaic
+
+        Examples:
+
+            >>> path = SkyImage((32768, 32768)).render_mosaic("mock_catalog.h5", "results/", workers=8)
+            >>> mosaic = np.load(path, mmap_mode="r")
+        """
+        assert (
+            not self._varying_psf
+        ), "Mosaics do not support PSFs varying over the field."
+
+        chunks = list(read_catalog(catalog, key=key))
+        if len(chunks) == 0:
+            chunks = [{"center_x": np.zeros(0), "center_y": np.zeros(0)}]
+        catalog = {
+            name: np.concatenate([chunk[name] for chunk in chunks])
+            for name in chunks[0]
+        }
+
+        height, width = self.image_shape[:2]
+        tile_shape = (min(tile_shape[0], height), min(tile_shape[1], width))
+        kernel_params = {
+            name: value for name, value in self.psf.items() if name != "method"
+        }
+        halo = psf_radius(**kernel_params)
+        truncation = 1e-3 if self.stamp_truncation is None else self.stamp_truncation
+        tiles = self._route_sources(catalog, tile_shape, halo, truncation)
+
+        os.makedirs(save_path, exist_ok=True)
+        save_path = save_path.rstrip("/")
+        if format == "npy":
+            file_path = f"{save_path}/{name}.npy"
+            output = np.lib.format.open_memmap(
+                file_path, mode="w+", dtype=dtype, shape=(height, width)
+            )
+        elif format == "h5":
+            file_path = f"{save_path}/{name}.h5"
+            h5_file = h5py.File(file_path, "w")
+            output = h5_file.create_dataset(
+                "data", shape=(height, width), dtype=dtype, chunks=tile_shape
+            )
+        else:
+            raise NotImplementedError(
+                f"Mosaic format {format} is not available. Please use 'npy' or 'h5'"
+            )
+
+        def render(tile):
+            (tile_row, tile_column), sources = tile
+            tile_rows = slice(
+                tile_row * tile_shape[0], min((tile_row + 1) * tile_shape[0], height)
+            )
+            tile_columns = slice(
+                tile_column * tile_shape[1],
+                min((tile_column + 1) * tile_shape[1], width),
+            )
+            tile_seed = np.random.SeedSequence(seed, spawn_key=(tile_row, tile_column))
+            image = self._render_tile(
+                catalog, sources, tile_rows, tile_columns, halo, tile_seed
+            )
+            return tile_rows, tile_columns, image
+
+        try:
+            tiles = list(tiles.items())
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # Tiles are rendered in batches, so at most a few are held in memory at once
+                for start in range(0, len(tiles), workers):
+                    for tile_rows, tile_columns, image in executor.map(
+                        render, tiles[start : start + workers]
+                    ):
+                        output[tile_rows, tile_columns] = image
+        finally:
+            if format == "npy":
+                output.flush()
+                del output
+            else:
+                h5_file.close()
+
+        return file_path
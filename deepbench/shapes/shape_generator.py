@@ -38,7 +38,10 @@ class ShapeGenerator:
         return resized_image
 
     def _convert_patch_to_image(
-        self, image: patches.Patch, cutout: patches.Path = None
+        self,
+        image: patches.Patch,
+        cutout: patches.Path = None,
+        out: np.ndarray = None,
     ):
 
         n_dim = len(self.image_shape)
@@ -59,6 +62,17 @@ class ShapeGenerator:
         coordinates = np.array(list(zip(*(c.flat for c in meshgrid))))
 
         valid_coordinates = Path(image.get_verts()).contains_points(coordinates)
+
+        # Add the shape into `out` instead of a new image
+        if out is not None:
+            if cutout is not None:
+                valid_coordinates &= ~Path(cutout.get_verts()).contains_points(
+                    coordinates
+                )
+            shape_points = coordinates[valid_coordinates]
+            out[shape_points[:, 0], shape_points[:, 1]] += 1.0
+            return out
+
         shape_points = coordinates[valid_coordinates]
 
         out_array = np.zeros(self.image_shape)
@@ -79,6 +93,7 @@ class ShapeGenerator:
         angle: Union[float, int] = 0,
         line_width: int = 1,
         fill: bool = False,
+        out: np.ndarray = None,
     ):
 
         """
@@ -91,6 +106,7 @@ class ShapeGenerator:
             angle (Union[float, int], optional): tilt the rectangle (degrees). Defaults to 0.
             line_width (int, optional): line width of the outline. Defaults to 1.
             fill (bool, optional): Fill in the rectangle. Defaults to False.
+            out (np.ndarray, optional): Image of `image_shape` the shape is added into, instead of a new image. Defaults to None.
 
 
         Returns:
@@ -119,7 +135,9 @@ class ShapeGenerator:
                 xy=xy_cutout, width=cutout_w, height=cutout_h, angle=angle
             )
 
-        rectangle_array = self._convert_patch_to_image(rectangle, cutout=cutout)
+        rectangle_array = self._convert_patch_to_image(
+            rectangle, cutout=cutout, out=out
+        )
 
         return rectangle_array
 
@@ -131,6 +149,7 @@ class ShapeGenerator:
         radius: Union[int, float] = np.random.uniform(8, 12),
         line_width=1,
         fill=False,
+        out: np.ndarray = None,
     ):
         """
         Create a polygon with equal length sides
@@ -142,6 +161,7 @@ class ShapeGenerator:
             radius (int, optional): distance from vertex to vertex Defaults to 10.
             line_width (int, optional): line width of the outline. Defaults to 1.
             fill (bool, optional): Fill in the rectangle. Defaults to False.
+            out (np.ndarray, optional): Image of `image_shape` the shape is added into, instead of a new image. Defaults to None.
 
 
         Returns:
@@ -176,7 +196,7 @@ class ShapeGenerator:
                 orientation=angle,
             )
 
-        polygon_array = self._convert_patch_to_image(polygon, cutout=cutout)
+        polygon_array = self._convert_patch_to_image(polygon, cutout=cutout, out=out)
 
         return polygon_array
 
@@ -187,6 +207,7 @@ class ShapeGenerator:
         theta1: Union[int, float] = np.random.uniform(0, 45),
         theta2: Union[int, float] = np.random.uniform(85, 120),
         line_width: int = 1,
+        out: np.ndarray = None,
     ):
         """
         Create an arc with radius "radius" arcing from theta1 to theta2 counter-clockwise
@@ -197,6 +218,7 @@ class ShapeGenerator:
             theta1 (Union[int, float], optional): starting point of the arc (degrees). Defaults to np.random.random(0, 45).
             theta2 (Union[int, float], optional): ending point of the arc (degrees). Defaults to np.random.random(85, 120).
             line_width (int, optional):  thickness of the arc (pixels) Defaults to 1.
+            out (np.ndarray, optional): Image of `image_shape` the shape is added into, instead of a new image. Defaults to None.
 
 
         Returns:
@@ -206,7 +228,7 @@ class ShapeGenerator:
         arc = patches.Wedge(
             center=center, r=radius, theta1=theta1, theta2=theta2, width=line_width
         )
-        arc_array = self._convert_patch_to_image(arc)
+        arc_array = self._convert_patch_to_image(arc, out=out)
 
         return arc_array
 
@@ -215,6 +237,7 @@ class ShapeGenerator:
         start: tuple = (np.random.randint(0, 10), np.random.randint(0, 10)),
         end: tuple = (np.random.randint(12, 28), np.random.randint(12, 28)),
         line_width: int = 1,
+        out: np.ndarray = None,
     ):
 
         """
@@ -224,6 +247,7 @@ class ShapeGenerator:
             start (tuple, optional): Starting corner of the line. Defaults to (np.random.randint(0, 10), np.random.randint(0, 10)).
             end (tuple, optional): Ending corner of the line. Defaults to (np.random.randint(12, 28), np.random.randint(12, 28)).
             line_width (int, optional): Thickness of the line (pixels). Defaults to 1.
+            out (np.ndarray, optional): Image of `image_shape` the shape is added into, instead of a new image. Defaults to None.
 
         Returns:
             np.ndarray
@@ -255,7 +279,7 @@ class ShapeGenerator:
             height=height_rect,
             angle=angle_degrees,
         )
-        line_array = self._convert_patch_to_image(line)
+        line_array = self._convert_patch_to_image(line, out=out)
 
         return line_array
 
@@ -267,6 +291,7 @@ class ShapeGenerator:
         angle: Union[float, int] = 0,
         line_width: int = 1,
         fill: bool = False,
+        out: np.ndarray = None,
     ):
         """
         Create an ellipse/circle (where width/height are the same)
@@ -278,6 +303,7 @@ class ShapeGenerator:
             angle (Union[float, int], optional):  Rotation angle of the ellipse (degrees). Defaults to 0.
             line_width (int, optional):  Width of the ellipse's border (pixels). Defaults to 1.
             fill (bool, optional): Fill the center of the ellipse. Defaults to False.
+            out (np.ndarray, optional): Image of `image_shape` the shape is added into, instead of a new image. Defaults to None.
 
 
         Returns:
@@ -305,14 +331,17 @@ class ShapeGenerator:
                 xy=xy_cutout, width=width_cutout, height=height_cutout, angle=angle
             )
 
-        ellipse_array = self._convert_patch_to_image(ellipse, cutout=cutout)
+        ellipse_array = self._convert_patch_to_image(ellipse, cutout=cutout, out=out)
 
         return ellipse_array
 
-    def create_empty_shape(self):
+    def create_empty_shape(self, out: np.ndarray = None):
         """
         Create an array of 0s with shape self.image_shape
 
+        Args:
+            out (np.ndarray, optional): Image of `image_shape`, returned unchanged as nothing is added to it. Defaults to None (a new array).
+
         Returns:
             np.ndarray
         """
@@ -324,4 +353,4 @@ class ShapeGenerator:
         if 0 in self.image_shape:
             raise ValueError(f"Image size must be greater than 0")
 
-        return np.zeros(self.image_shape)
+        return np.zeros(self.image_shape) if out is None else out
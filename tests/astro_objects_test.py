@@ -1,4 +1,5 @@
 import pytest
+import numpy as np
 from deepbench.astro_object.astro_object import AstroObject
 
 # Checking all the child classes work
@@ -6,6 +7,7 @@ from deepbench.astro_object import GalaxyObject
 from deepbench.astro_object import NBodyObject
 from deepbench.astro_object import SpiralGalaxyObject
 from deepbench.astro_object import StarObject
+from deepbench.astro_object import StarFieldObject
 
 
 def test_astro_init():
@@ -65,3 +67,220 @@ def test_object_contains():
     assert (star != galaxy).all()
     assert (star != spiral).all()
     assert (galaxy != spiral).all()
+
+
+def test_star_stamp():
+    star = StarObject(image_dimensions=(64, 64), noise_level=0, radius=2.0)
+    full_frame = star.create_object(center_x=30, center_y=20, alpha=2.0)
+    stamp, (rows, columns) = star.create_stamp(
+        truncation=1e-3, center_x=30, center_y=20, alpha=2.0
+    )
+
+    assert stamp.shape == (rows.stop - rows.start, columns.stop - columns.start)
+    assert stamp.shape[0] < 64
+    assert abs(stamp - full_frame[rows, columns]).max() < 1e-3
+
+
+def test_spiral_stamp_is_full_frame():
+    spiral = SpiralGalaxyObject(image_dimensions=(28, 28), noise_level=0)
+    stamp, (rows, columns) = spiral.create_stamp(center_x=14, center_y=14)
+
+    assert stamp.shape == (28, 28)
+    assert (rows, columns) == (slice(0, 28), slice(0, 28))
+
+
+def test_star_field_matches_stars():
+    image_shape = (48, 48)
+    centers_x = [5.2, 20.0, 46.6, -3.0, 20.4]
+    centers_y = [4.0, 30.5, 46.2, 10.0, 31.0]
+    radius = [1.0, 2.0, 1.5, 2.0, 0.5]
+    alpha = [1.5, 3.0, 2.0, 2.0, 4.0]
+    amplitude = [1.0, 0.5, 2.0, 1.0, 3.0]
+
+    field = StarFieldObject(image_dimensions=image_shape, noise_level=0)
+    field_image = field.create_star_field(
+        centers_x,
+        centers_y,
+        amplitude=amplitude,
+        radius=radius,
+        alpha=alpha,
+        truncation=1e-6,
+    )
+
+    stars = np.zeros(image_shape)
+    for x, y, star_radius, star_alpha, star_amplitude in zip(
+        centers_x, centers_y, radius, alpha, amplitude
+    ):
+        star = StarObject(
+            image_dimensions=image_shape, radius=star_radius, amplitude=star_amplitude
+        )
+        stars += star.create_Moffat_profile(x, y, alpha=star_alpha)
+
+    assert field_image.shape == image_shape
+    assert abs(field_image - stars).max() < 1e-4
+
+
+def test_star_field_outside_frame():
+    field = StarFieldObject(image_dimensions=(16, 16))
+    image = field.create_object(center_x=[100.0, -50.0], center_y=[3.0, 8.0])
+    assert image.sum() == 0
+
+    assert field.create_object(center_x=[], center_y=[]).sum() == 0
+
+
+def test_cached_grids():
+    from deepbench.astro_object.astro_object import coordinate_grid, polar_grid
+
+    x, y = coordinate_grid((12, 10))
+    expected_x, expected_y = np.meshgrid(np.arange(12), np.arange(10))
+    assert np.array_equal(x, expected_x) and np.array_equal(y, expected_y)
+    assert coordinate_grid([12, 10])[0] is x
+    with pytest.raises(ValueError):
+        x[0, 0] = 5
+
+    radius, angle = polar_grid((12, 12))
+    X, Y = np.meshgrid(np.linspace(-6, 6, 12), np.linspace(-6, 6, 12))
+    assert np.allclose(radius, np.sqrt(X**2 + Y**2))
+    assert np.allclose(angle, np.arctan2(Y, X) + np.pi)
+    assert polar_grid((12, 12))[1] is angle
+
+    star = StarObject(image_dimensions=(12, 12))
+    assert star.create_meshgrid()[0] is coordinate_grid((12, 12))[0]
+
+
+def test_star_batch_matches_stars():
+    centers_x = [14.0, 10.5, 3.2]
+    centers_y = [14.0, 20.0, 25.7]
+    radius = [1.0, 2.0, 1.5]
+    alpha = [1.0, 3.0, 2.0]
+
+    star = StarObject(image_dimensions=(28, 28), noise_level=0, amplitude=2.0)
+    batch = star.create_batch(centers_x, centers_y, radius=radius, alpha=alpha)
+
+    assert batch.shape == (3, 28, 28)
+    assert batch.dtype == np.float32
+    for image, x, y, star_radius, star_alpha in zip(
+        batch, centers_x, centers_y, radius, alpha
+    ):
+        single = StarObject(
+            image_dimensions=(28, 28), noise_level=0, radius=star_radius, amplitude=2.0
+        ).create_object(x, y, alpha=star_alpha)
+        assert np.allclose(image, single, atol=1e-5)
+
+
+def test_star_batch_seeds():
+    star = StarObject(image_dimensions=(16, 16), noise_level=0.5)
+    star.set_psf("moffat", method="fft", gamma=1.5)
+    batch = star.create_batch(center_x=8, center_y=[8, 8, 8], seeds=[0, 1, 0])
+
+    assert np.array_equal(batch[0], batch[2])
+    assert not np.array_equal(batch[0], batch[1])
+
+    single = star.create_batch(center_x=8, center_y=8, seeds=[1])
+    assert np.array_equal(single[0], batch[1])
+
+
+def test_star_batch_seed():
+    star = StarObject(image_dimensions=(16, 16), noise_level=0.5)
+    batch = star.create_batch(center_x=8, center_y=[8, 8, 8], seed=3)
+
+    assert np.array_equal(
+        batch, star.create_batch(center_x=8, center_y=[8, 8, 8], seed=3)
+    )
+    assert not np.array_equal(batch[0], batch[1])
+    assert not np.array_equal(
+        batch, star.create_batch(center_x=8, center_y=[8, 8, 8], seed=4)
+    )
+
+    # One generator per chunk, keyed on the index of its first star
+    rng = np.random.default_rng(np.random.SeedSequence(3, spawn_key=(0,)))
+    noiseless = StarObject(image_dimensions=(16, 16), noise_level=0).create_batch(
+        center_x=8, center_y=[8, 8, 8]
+    )
+    noise = rng.poisson(0.5, size=batch.shape).astype(np.float32)
+    # The PSF is linear, so it can be applied to the noise alone
+    assert np.allclose(
+        batch, noiseless + [star.create_psf(image) for image in noise], atol=1e-5
+    )
+
+
+def test_spiral_arms_match_loop():
+    spiral = SpiralGalaxyObject(
+        image_dimensions=(40, 40),
+        radius=10,
+        winding_number=3,
+        arm_thickness=2,
+        noise_level=0,
+    )
+    profile = spiral.create_spiral_profile(center_x=20, center_y=20)
+
+    from deepbench.astro_object.astro_object import polar_grid
+
+    R, theta = polar_grid((40, 40))
+    expected = np.zeros_like(R)
+    for arm in range(3):
+        r_spiral = (20 / (2 * np.pi)) * np.exp(
+            (theta - 2 * np.pi * arm / 3) / np.tan(0.2)
+        )
+        expected += np.exp(-((R - r_spiral) ** 2) / (2 * 2**2))
+
+    assert np.allclose(profile, expected)
+
+
+def test_spiral_shift_placement():
+    from deepbench.astro_object.spiral_galaxy import _spiral_template
+
+    spiral = SpiralGalaxyObject(
+        image_dimensions=(40, 40),
+        radius=10,
+        arm_thickness=2,
+        noise_level=0,
+        placement="shift",
+    )
+    centered = spiral.create_spiral_profile(center_x=20, center_y=20)
+    hits = _spiral_template.cache_info().hits
+    moved = spiral.create_spiral_profile(center_x=23, center_y=18)
+
+    assert _spiral_template.cache_info().hits == hits + 1
+    assert np.allclose(moved[10:30, 13:33], centered[12:32, 10:30])
+
+    half = spiral.create_spiral_profile(center_x=20.5, center_y=20)
+    assert np.allclose(half[:, 1:], (centered[:, 1:] + centered[:, :-1]) / 2)
+
+
+def test_spiral_shift_matches_frame_at_center():
+    params = {"radius": 10, "winding_number": 3, "arm_thickness": 2, "noise_level": 0}
+    frame = SpiralGalaxyObject(image_dimensions=(41, 41), **params)
+    shift = SpiralGalaxyObject(image_dimensions=(41, 41), placement="shift", **params)
+
+    assert np.allclose(
+        shift.create_spiral_profile(center_x=20, center_y=20),
+        frame.create_spiral_profile(center_x=20, center_y=20),
+    )
+
+
+def test_spiral_shift_outside_frame():
+    spiral = SpiralGalaxyObject(
+        image_dimensions=(40, 40),
+        radius=10,
+        arm_thickness=2,
+        noise_level=0,
+        placement="shift",
+    )
+    inside = spiral.create_spiral_profile(center_x=0, center_y=20)
+    outside = spiral.create_spiral_profile(center_x=-20, center_y=20)
+    far = spiral.create_spiral_profile(center_x=50, center_y=-45.5)
+
+    # Centers outside of the frame are kept, not moved to its edge
+    assert not np.allclose(outside, inside)
+    assert np.allclose(outside[:, :20], inside[:, 20:])
+    assert far.shape == (40, 40)
+    assert np.allclose(
+        far[:, 30:], spiral.create_spiral_profile(center_x=20, center_y=-45.5)[:, :10]
+    )
+
+
+def test_spiral_unknown_placement():
+    spiral = SpiralGalaxyObject(image_dimensions=(8, 8), placement="not a placement")
+    with pytest.raises(NotImplementedError):
+        spiral.create_object(center_x=4, center_y=4)
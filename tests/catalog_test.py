@@ -0,0 +1,203 @@
+import pytest
+import h5py
+import numpy as np
+
+from deepbench.astro_object import GalaxyObject
+from deepbench.image import SkyImage
+from deepbench.image.catalog import read_catalog
+
+
+@pytest.fixture()
+def catalog():
+    rows = [
+        ("star", 10.0, 12.0, 1.0, 1.0, 2.0, 1.0),
+        ("galaxy", 40.0, 30.0, 4.0, 1.0, 1.0, 1.5),
+        ("star", 50.5, 3.2, 2.0, 0.5, 3.0, 1.0),
+        ("galaxy", 20.0, 50.0, 3.0, 2.0, 1.0, 0.8),
+        ("star", 30.0, 60.0, 1.5, 2.0, 1.5, 1.0),
+    ]
+    return np.array(
+        rows,
+        dtype=[
+            ("type", "U6"),
+            ("center_x", float),
+            ("center_y", float),
+            ("radius", float),
+            ("amplitude", float),
+            ("alpha", float),
+            ("n", float),
+        ],
+    )
+
+
+def write_csv(catalog, path):
+    with open(path, "w") as f:
+        f.write(",".join(catalog.dtype.names) + "\n")
+        for row in catalog:
+            f.write(",".join(str(value) for value in row) + "\n")
+
+
+def test_read_chunks(catalog, tmp_path):
+    write_csv(catalog, tmp_path / "catalog.csv")
+    with h5py.File(tmp_path / "catalog.h5", "w") as f:
+        f["catalog"] = catalog.astype(
+            [(name, "S6" if name == "type" else float) for name in catalog.dtype.names]
+        )
+
+    for source in [
+        catalog,
+        str(tmp_path / "catalog.csv"),
+        str(tmp_path / "catalog.h5"),
+    ]:
+        chunks = list(read_catalog(source, chunk_size=2))
+        assert [len(chunk["center_x"]) for chunk in chunks] == [2, 2, 1]
+        assert list(np.concatenate([chunk["type"] for chunk in chunks])) == list(
+            catalog["type"]
+        )
+        assert np.allclose(
+            np.concatenate([chunk["radius"] for chunk in chunks]), catalog["radius"]
+        )
+
+
+def test_read_h5_columns(catalog, tmp_path):
+    with h5py.File(tmp_path / "catalog.h5", "w") as f:
+        for name in catalog.dtype.names:
+            f[f"sources/{name}"] = (
+                catalog[name].astype("S6") if name == "type" else catalog[name]
+            )
+
+    chunks = list(
+        read_catalog(str(tmp_path / "catalog.h5"), chunk_size=4, key="sources")
+    )
+    assert list(chunks[1]["type"]) == ["star"]
+    assert np.allclose(np.concatenate([chunk["n"] for chunk in chunks]), catalog["n"])
+
+
+def test_render_catalog_chunks(catalog, tmp_path):
+    write_csv(catalog, tmp_path / "catalog.csv")
+    sky = SkyImage((64, 64))
+
+    image = sky.render_catalog(catalog)
+    assert image.shape == (64, 64)
+    assert np.allclose(sky.render_catalog(catalog, chunk_size=2), image)
+    assert np.allclose(
+        sky.render_catalog(str(tmp_path / "catalog.csv"), chunk_size=3), image
+    )
+
+
+def test_render_catalog_matches_objects(catalog):
+    image_shape = (64, 64)
+    sky = SkyImage(image_shape, scale=False, shared_psf=True, stamp_truncation=1e-3)
+    image = sky.render_catalog(catalog)
+
+    objects, instance_params, object_params = [], [], []
+    for row in catalog:
+        objects.append(str(row["type"]))
+        instance = {"radius": row["radius"], "amplitude": row["amplitude"]}
+        position = {"center_x": row["center_x"], "center_y": row["center_y"]}
+        if row["type"] == "star":
+            position["alpha"] = row["alpha"]
+        else:
+            instance["n"] = row["n"]
+        instance_params.append(instance)
+        object_params.append(position)
+    expected = sky.combine_objects(objects, instance_params, object_params)
+
+    assert abs(image - expected).max() < 1e-2 * expected.max()
+
+
+def test_render_catalog_galaxy_stamps():
+    rng = np.random.default_rng(0)
+    catalog = {
+        "type": np.full(40, "galaxy"),
+        "center_x": rng.uniform(-5, 69, 40),
+        "center_y": rng.uniform(-5, 69, 40),
+        "radius": rng.choice([1.0, 2.0, 3.5], 40),
+        "n": rng.choice([0.5, 1.0, 2.5], 40),
+        "theta": rng.uniform(-1.5, 1.5, 40),
+    }
+    sky = SkyImage((64, 64))
+    image = sky.render_catalog(catalog, chunk_size=15)
+
+    expected = np.zeros((64, 64))
+    for row in range(40):
+        galaxy = GalaxyObject(
+            (64, 64),
+            radius=catalog["radius"][row],
+            n=catalog["n"][row],
+            theta=catalog["theta"][row],
+            noise_level=0,
+        )
+        stamp, (rows, columns) = galaxy.create_stamp(
+            psf=False,
+            center_x=catalog["center_x"][row],
+            center_y=catalog["center_y"][row],
+        )
+        expected[rows, columns] += stamp
+    sky._convolve_psf(expected)
+
+    assert np.allclose(image, expected)
+
+
+def test_render_catalog_unknown_type(catalog):
+    catalog["type"][0] = "comet"
+    with pytest.raises(NotImplementedError):
+        SkyImage((64, 64)).render_catalog(catalog)
+
+
+def test_mosaic_matches_image(catalog, tmp_path):
+    image_shape = (64, 72)
+    sky = SkyImage(image_shape, psf={"kernel": "moffat", "gamma": 1.5})
+    image = sky.render_catalog(catalog)
+
+    npy_path = sky.render_mosaic(catalog, str(tmp_path), tile_shape=(20, 16))
+    mosaic = np.load(npy_path)
+    assert mosaic.shape == image_shape
+    assert mosaic.dtype == np.float32
+    assert np.allclose(mosaic, image, atol=1e-6)
+
+    h5_path = sky.render_mosaic(
+        catalog,
+        str(tmp_path),
+        tile_shape=(32, 32),
+        format="h5",
+        dtype="float64",
+        workers=3,
+    )
+    with h5py.File(h5_path, "r") as f:
+        assert f["data"].chunks == (32, 32)
+        assert np.allclose(f["data"][:], image)
+
+
+def test_mosaic_matches_image_with_spiral(catalog, tmp_path):
+    catalog = catalog.astype(
+        [(name, "U13" if name == "type" else float) for name in catalog.dtype.names]
+    )
+    spiral = np.zeros(1, dtype=catalog.dtype)
+    spiral[0] = ("spiral_galaxy", 25.0, 40.0, 10.0, 1.0, 0.0, 1.0)
+    catalog = np.concatenate([catalog, spiral])
+
+    sky = SkyImage((64, 64))
+    image = sky.render_catalog(catalog)
+    mosaic = np.load(sky.render_mosaic(catalog, str(tmp_path), tile_shape=(16, 16)))
+    assert np.allclose(mosaic, image, atol=1e-5)
+
+    # The spiral is centered on its catalog position, not on the image
+    spiral_image = sky.render_catalog(spiral)
+    assert abs(spiral_image - spiral_image[:, ::-1]).max() > 0.1 * spiral_image.max()
+
+
+def test_mosaic_noise(catalog, tmp_path):
+    sky = SkyImage((64, 64), object_noise_level=0.1)
+    first = np.load(
+        sky.render_mosaic(catalog, str(tmp_path / "first"), tile_shape=(16, 16), seed=3)
+    )
+    second = np.load(
+        sky.render_mosaic(
+            catalog, str(tmp_path / "second"), tile_shape=(16, 16), seed=3, workers=4
+        )
+    )
+
+    assert np.array_equal(first, second)
+    # Tiles draw different noise
+    assert not np.allclose(first[:16, :16], first[16:32, :16])
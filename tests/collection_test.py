@@ -129,8 +129,66 @@ def test_included_seed(default_physics):
     default_physics["seed"] = 56
     physics = Collection(default_physics)
     physics()
+    repeat_physics = Collection(default_physics)
+    repeat_physics()
+
+    seeds = [physics.object_params[key]["seed"] for key in physics.object_params]
+    assert len(seeds) == len(set(seeds))
     for key in physics.object_params:
-        assert physics.object_params[key]["seed"] == 56
+        assert physics.object_params[key]["seed"] == repeat_physics.object_params[key]["seed"]
+        assert (physics.objects[key] == repeat_physics.objects[key]).all()
+
+
+def test_regenerate_single_object(default_sky):
+    default_sky["seed"] = 12
+    default_sky["image_parameters"]["object_noise_level"] = 0.3
+    default_sky["object_parameters"]["star"]["instance"]["noise_level"] = 0.5
+    sky = Collection(default_sky)
+    sky()
+
+    object, params = sky.regenerate(2)
+    assert (object == sky.objects[2]).all()
+    assert params["seed"] == sky.object_params[2]["seed"]
+    assert not (sky.objects[0] == sky.objects[1]).all()
+
+
+def test_saved_seeds_regenerate(default_sky, tmp_path):
+    import h5py
+    from deepbench.image import SkyImage
+
+    default_sky["image_parameters"]["object_noise_level"] = 0.3
+    sky = Collection(default_sky)
+    sky()
+    sky.save(str(tmp_path))
+
+    with h5py.File(f"{tmp_path}/dataset.h5", "r") as f:
+        dataset_seed = f["data"].attrs["dataset_seed"]
+        saved = f["data"][1]
+    with open(f"{tmp_path}/dataset_parameters.yaml") as f:
+        params = yaml.safe_load(f)[1]
+    assert params["dataset_seed"] == dataset_seed
+
+    # The dataset seed regenerates the saved objects
+    object, _ = Collection({**default_sky, "seed": int(dataset_seed)}).regenerate(1)
+    assert np.allclose(object, saved)
+
+    # The saved seed is the one the image was made with
+    image = SkyImage(**default_sky["image_parameters"]).combine_objects(
+        ["star"], [params["star"]["instance"]], [params["star"]["object"]], seed=params["seed"]
+    )
+    assert (image == sky.objects[1]).all()
+
+
+def test_runtime_arguments_not_saved(default_sky, default_shape, tmp_path):
+    for config in (default_sky, default_shape):
+        collection = Collection(config)
+        collection()
+        assert "out" not in collection.engine_defaults()
+        assert "out" not in collection.object_params[0]
+
+    collection.save(str(tmp_path))
+    with open(f"{tmp_path}/dataset_parameters.yaml") as f:
+        assert "out" not in yaml.safe_load(f)[0]
 
 
 def test_generate_seed(default_physics):
@@ -148,6 +206,7 @@ def test_find_default_params(default_physics):
     default_object_params_keys = {
         "time",
         "seed",
+        "dataset_seed",
         "pendulum_arm_length",
         "starting_angle_radians",
         "acceleration_due_to_gravity",
@@ -200,6 +259,31 @@ def test_add_parameter_noise(default_physics):
     )
 
 
+def test_save_sky_parameter_noise(default_sky, tmp_path):
+    default_sky["parameter_noise"] = 0.3
+    default_sky["total_runs"] = 2
+    sky = Collection(default_sky)
+    sky()
+    sky.save(str(tmp_path))
+
+    with open(f"{tmp_path}/dataset_parameters.yaml") as f:
+        params = yaml.safe_load(f)
+    assert params[1]["star"]["object"]["center_x"] == sky.object_params[1]["star"]["object"]["center_x"]
+
+
+def test_parameter_noise_seed(default_physics):
+    default_physics["parameter_noise"] = 0.2
+    physics = Collection(default_physics)
+    params = {"length": 1.0, "time": [0.0, 1.0]}
+
+    noisy = physics.add_parameter_noise(seed=3, params=params)
+    expected = np.random.default_rng(seed=3).uniform(high=0.2, size=2)
+
+    assert np.allclose(noisy["time"], np.asarray(params["time"]) + expected)
+    assert np.array_equal(noisy["time"], physics.add_parameter_noise(seed=3, params=params)["time"])
+    assert noisy["length"] != physics.add_parameter_noise(seed=4, params=params)["length"]
+
+
 def test_no_added_noise(default_physics):
     default_physics.pop("parameter_noise", None)
     physics = Collection(default_physics)
@@ -235,3 +319,336 @@ def test_save_results_yes_path(default_physics):
     collection = Collection(default_physics)
     collection.add_object()
     collection.save()
+
+
+def test_parallel_matches_serial(default_physics):
+    default_physics["seed"] = 56
+    default_physics["total_runs"] = 6
+    serial = Collection(default_physics)
+    serial()
+
+    default_physics["workers"] = 2
+    parallel = Collection(default_physics)
+    parallel()
+
+    assert list(parallel.objects.keys()) == list(serial.objects.keys())
+    for index in serial.objects:
+        assert (parallel.objects[index] == serial.objects[index]).all()
+        assert parallel.object_params[index]["seed"] == serial.object_params[index]["seed"]
+
+
+def test_parallel_image_order(default_shape):
+    default_shape["total_runs"] = 5
+    shapes = Collection(default_shape)
+    shapes(workers=2)
+
+    assert list(shapes.objects.keys()) == list(range(5))
+    assert list(shapes.object_params.keys()) == list(range(5))
+    assert shapes.n_objects == 5
+
+
+def test_stream_to_h5(default_shape, tmp_path):
+    import h5py
+
+    default_shape["total_runs"] = 5
+    collection = Collection(default_shape)
+    collection.stream(str(tmp_path), chunk_size=2)
+
+    assert len(collection.objects) == 0
+    assert len(collection.object_params) == 0
+    with h5py.File(f"{tmp_path}/dataset.h5", "r") as f:
+        assert f["data"].shape == (5, 28, 28)
+    params = yaml.safe_load(open(f"{tmp_path}/dataset_parameters.yaml"))
+    assert list(params.keys()) == list(range(5))
+    assert params[4]["seed"] == collection.regenerate(4)[1]["seed"]
+
+
+def test_parallel_stream_matches_serial(default_physics, tmp_path, monkeypatch):
+    import h5py
+    from deepbench.collection import collection as collection_module
+
+    default_physics["seed"] = 56
+    default_physics["total_runs"] = 6
+    serial = Collection(default_physics)
+    serial()
+
+    pools = []
+    pool = collection_module.ProcessPoolExecutor
+
+    def counted_pool(*args, **kwargs):
+        pools.append(kwargs)
+        return pool(*args, **kwargs)
+
+    monkeypatch.setattr(collection_module, "ProcessPoolExecutor", counted_pool)
+    Collection(default_physics).stream(str(tmp_path), chunk_size=2, workers=2)
+
+    assert len(pools) == 1
+    with h5py.File(f"{tmp_path}/dataset.h5", "r") as f:
+        for index in serial.objects:
+            assert np.allclose(f["data"][index], serial.objects[index])
+
+
+def test_stream_matches_save(default_physics, tmp_path):
+    import h5py
+
+    default_physics["seed"] = 56
+    collection = Collection(default_physics)
+    collection()
+    collection.save(f"{tmp_path}/full")
+
+    default_physics["chunk_size"] = 2
+    default_physics["name"] = f"{tmp_path}/streamed"
+    Collection(default_physics)()
+
+    with h5py.File(f"{tmp_path}/full/dataset.h5", "r") as full, h5py.File(
+        f"{tmp_path}/streamed/dataset.h5", "r"
+    ) as streamed:
+        assert (full["data"][:] == streamed["data"][:]).all()
+
+
+def test_stream_h5_parameters_match_save(default_sky, tmp_path):
+    from deepbench.collection import load_parameters
+
+    default_sky["seed"] = 8
+    default_sky["total_runs"] = 5
+    default_sky["parameter_noise"] = 0.5
+    default_sky["parameter_format"] = "h5"
+    collection = Collection(default_sky)
+    collection()
+    collection.save(f"{tmp_path}/full")
+    Collection(default_sky).stream(f"{tmp_path}/streamed", chunk_size=2)
+
+    full = load_parameters(f"{tmp_path}/full/dataset.h5")
+    streamed = load_parameters(f"{tmp_path}/streamed/dataset.h5")
+    assert full.keys() == streamed.keys()
+    for name in full:
+        assert np.array_equal(full[name], streamed[name])
+    assert streamed["dataset_seed"] == 8
+    assert streamed["star/object/center_x"].shape == (5,)
+
+
+def test_shards_cover_dataset(default_physics):
+    default_physics["total_runs"] = 7
+    shards = [Collection(default_physics, shard_index=index, num_shards=3) for index in range(3)]
+
+    indices = [index for shard in shards for index in shard.object_indices]
+    assert indices == list(range(7))
+
+
+def test_merge_shards(default_shape, tmp_path):
+    import h5py
+    from deepbench.collection import merge_shards
+
+    default_shape["total_runs"] = 7
+    default_shape["seed"] = 3
+    full = Collection(default_shape)
+    full()
+
+    default_shape["name"] = str(tmp_path)
+    default_shape["num_shards"] = 3
+    for index in range(3):
+        default_shape["shard_index"] = index
+        Collection(default_shape)()
+
+    merge_shards(str(tmp_path))
+
+    with h5py.File(f"{tmp_path}/dataset.h5", "r") as f:
+        assert f["data"].is_virtual
+        assert f["data"].shape == (7, 28, 28)
+        assert f["data"].attrs["dataset_seed"] == 3
+        for index in range(7):
+            assert (f["data"][index] == full.objects[index]).all()
+
+    params = yaml.safe_load(open(f"{tmp_path}/dataset_parameters.yaml"))
+    assert list(params.keys()) == list(range(7))
+    assert params[5]["seed"] == full.object_params[5]["seed"]
+
+
+def test_save_h5_parameters(default_sky, tmp_path):
+    from deepbench.collection import load_parameters
+
+    default_sky["total_runs"] = 4
+    collection = Collection(default_sky)
+    collection()
+    collection.save(str(tmp_path), parameter_format="h5")
+
+    assert not os.path.exists(f"{tmp_path}/dataset_parameters.yaml")
+    params = load_parameters(f"{tmp_path}/dataset.h5")
+
+    assert (params["index"] == np.arange(4)).all()
+    assert params["seed"].shape == (4,)
+    assert [int(seed) for seed in params["seed"]] == [
+        collection.object_params[index]["seed"] for index in range(4)
+    ]
+    assert params["star/object/center_x"] == 14
+    assert list(params["image_shape"]) == [28, 28]
+
+    seeds = load_parameters(f"{tmp_path}/dataset.h5", columns=["seed"])
+    assert list(seeds.keys()) == ["seed"]
+
+
+def test_merge_h5_parameter_shards(default_physics, tmp_path):
+    from deepbench.collection import merge_shards, load_parameters
+
+    default_physics["total_runs"] = 5
+    default_physics["name"] = str(tmp_path)
+    default_physics["parameter_format"] = "h5"
+    for index in range(2):
+        Collection(default_physics, shard_index=index, num_shards=2)()
+
+    merge_shards(str(tmp_path))
+    params = load_parameters(f"{tmp_path}/dataset.h5")
+
+    assert (params["index"] == np.arange(5)).all()
+    assert params["time"].shape == (5, 10)
+    assert params["pendulum_arm_length"] == 2
+
+
+def test_save_compressed(default_shape, tmp_path):
+    import h5py
+
+    collection = Collection(default_shape)
+    collection()
+    collection.save(str(tmp_path), compression="gzip", shuffle=True, dtype="float16")
+
+    with h5py.File(f"{tmp_path}/dataset.h5", "r") as f:
+        assert f["data"].compression == "gzip"
+        assert f["data"].chunks == (1, 28, 28)
+        assert f["data"].dtype == np.float16
+        assert np.allclose(f["data"][0], collection.objects[0], atol=1e-2)
+
+
+def test_save_uint8(default_sky, tmp_path):
+    import h5py
+
+    collection = Collection(default_sky)
+    collection.stream(str(tmp_path), chunk_size=2, dtype="uint8", compression="lzf")
+    regenerated, _ = collection.regenerate(1)
+
+    with h5py.File(f"{tmp_path}/dataset.h5", "r") as f:
+        assert f["data"].dtype == np.uint8
+        decoded = f["data"][1] * f["data_scale"][1] + f["data_offset"][1]
+        step = f["data_scale"][1]
+
+    assert np.allclose(decoded, regenerated, atol=step)
+
+
+def test_save_empty_collection(default_physics, tmp_path):
+    collection = Collection(default_physics)
+
+    with pytest.raises(ValueError):
+        collection.save(str(tmp_path))
+
+
+def test_save_contiguous(default_physics, tmp_path):
+    import h5py
+
+    collection = Collection(default_physics)
+    collection()
+    collection.save(str(tmp_path), chunks=False)
+
+    with h5py.File(f"{tmp_path}/dataset.h5", "r") as f:
+        assert f["data"].chunks is None
+
+
+def test_stream_background_writer(default_shape, tmp_path):
+    import h5py
+
+    default_shape["total_runs"] = 7
+    default_shape["seed"] = 4
+    collection = Collection(default_shape)
+    collection.stream(f"{tmp_path}/serial", chunk_size=2)
+
+    collection = Collection(default_shape)
+    collection.stream(f"{tmp_path}/threaded", chunk_size=2, queue_size=1)
+
+    with h5py.File(f"{tmp_path}/serial/dataset.h5", "r") as serial, h5py.File(
+        f"{tmp_path}/threaded/dataset.h5", "r"
+    ) as threaded:
+        assert threaded["data"].shape == (7, 28, 28)
+        assert (serial["data"][:] == threaded["data"][:]).all()
+    assert os.path.exists(f"{tmp_path}/threaded/dataset_parameters.yaml")
+
+
+def test_background_writer_error(default_shape, tmp_path):
+    from deepbench.collection import Save, ThreadedSave
+
+    collection = Collection(default_shape)
+    collection()
+    save = ThreadedSave(Save(collection, str(tmp_path)), queue_size=1)
+    save.append([np.zeros((2, 2)), np.zeros((3, 3))])
+
+    with pytest.raises(RuntimeError):
+        save.close()
+
+
+def test_stream_error_closes_writer(default_shape, tmp_path, monkeypatch):
+    import h5py
+    import threading
+
+    default_shape["total_runs"] = 6
+    collection = Collection(default_shape)
+    create_objects = collection._create_objects
+
+    def fail_after_first_chunk(indices):
+        if indices.start > 0:
+            raise ValueError("generation failed")
+        return create_objects(indices)
+
+    monkeypatch.setattr(collection, "_create_objects", fail_after_first_chunk)
+    with pytest.raises(ValueError):
+        collection.stream(str(tmp_path), chunk_size=2, queue_size=1)
+
+    assert threading.active_count() == 1
+    # The file was closed, so it can be opened for writing again
+    with h5py.File(f"{tmp_path}/dataset.h5", "a") as f:
+        assert f["data"].shape == (2, 28, 28)
+    # Only the parameters of the written objects are saved
+    params = yaml.safe_load(open(f"{tmp_path}/dataset_parameters.yaml"))
+    assert list(params.keys()) == [0, 1]
+
+
+def test_engine_defaults_cached(default_physics):
+    physics = Collection(default_physics)
+    defaults = physics.engine_defaults()
+
+    assert physics.engine_defaults() is defaults
+    assert Collection(default_physics).engine_defaults()["mass_pendulum_bob"] == 10.0
+    with pytest.raises(TypeError):
+        defaults["mass_pendulum_bob"] = 1.0
+
+
+def test_batch_parameter_noise_matches_single(default_sky):
+    default_sky["parameter_noise"] = 0.5
+    sky = Collection(default_sky)
+    params = sky.object_rules["star"]["object"]
+
+    table = sky.parameter_noise_table(3, 4, params, "star/object")
+    assert table["center_x"].shape == (4,)
+    for row in range(4):
+        single = sky.add_parameter_noise(3 + row, params, "star/object")
+        assert single["center_x"] == table["center_x"][row]
+        assert single["alpha"] == table["alpha"][row]
+
+
+def test_parameter_noise_independent_keys(default_physics):
+    default_physics["parameter_noise"] = 0.2
+    default_physics["object_parameters"] = {"a": [0.0] * 5, "b": [0.0] * 5, "flag": True}
+    physics = Collection(default_physics)
+
+    table = physics.parameter_noise_table(0, 10, physics.object_rules)
+    assert table["a"].shape == table["b"].shape == (10, 5)
+    assert not np.allclose(table["a"], table["b"])
+    assert "flag" not in table
+
+
+def test_noisy_sky_regenerates(default_sky):
+    default_sky["parameter_noise"] = 0.5
+    default_sky["total_runs"] = 4
+    sky = Collection(default_sky)
+    sky()
+
+    object, params = sky.regenerate(3)
+    assert (object == sky.objects[3]).all()
+    assert params["star"]["object"]["center_x"] == sky.object_params[3]["star"]["object"]["center_x"]
+    assert sky.object_params[0]["star"]["object"]["center_x"] != sky.object_params[1]["star"]["object"]["center_x"]
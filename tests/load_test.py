@@ -0,0 +1,80 @@
+import pytest
+import os
+import yaml
+import numpy as np
+
+from deepbench.collection import Collection, Load
+
+
+@pytest.fixture()
+def default_shape():
+    config = yaml.safe_load(
+        open(f"{os.path.dirname(__file__)}/../deepbench/settings/default_shapes.yaml")
+    )
+    config["total_runs"] = 6
+    config["seed"] = 8
+    return config
+
+
+@pytest.fixture()
+def shapes(default_shape):
+    collection = Collection(default_shape)
+    collection()
+    return collection
+
+
+def test_load_npy(shapes, tmp_path):
+    shapes.save(str(tmp_path), format="npy", parameter_format="h5")
+    dataset = Load(str(tmp_path))
+
+    assert isinstance(dataset.data, np.memmap)
+    assert len(dataset) == 6
+    assert (dataset[2] == shapes.objects[2]).all()
+
+
+def test_load_contiguous_h5_is_memmapped(shapes, tmp_path):
+    shapes.save(str(tmp_path), chunks=False)
+    with Load(str(tmp_path)) as dataset:
+        assert isinstance(dataset.data, np.memmap)
+        assert (dataset[1:3] == np.stack([shapes.objects[1], shapes.objects[2]])).all()
+
+
+def test_load_chunked_batch(shapes, tmp_path):
+    shapes.save(str(tmp_path), compression="gzip")
+    with Load(str(tmp_path)) as dataset:
+        assert not isinstance(dataset.data, np.memmap)
+
+        batch = dataset[[4, 1, 4]]
+        assert batch.shape == (3, 28, 28)
+        for position, index in enumerate([4, 1, 4]):
+            assert (batch[position] == shapes.objects[index]).all()
+
+
+def test_load_uint8(shapes, tmp_path):
+    shapes.save(str(tmp_path), dtype="uint8")
+    with Load(str(tmp_path)) as dataset:
+        assert dataset[0].dtype == np.float32
+        assert np.allclose(dataset[[0, 5]][1], shapes.objects[5], atol=0.01)
+
+
+def test_load_batch_h5_params(shapes, tmp_path):
+    shapes.save(str(tmp_path), parameter_format="h5")
+    with Load(str(tmp_path)) as dataset:
+        objects, params = dataset.get_batch([3, 0])
+
+        assert objects.shape[0] == 2
+        assert list(params["index"]) == [3, 0]
+        assert list(params["seed"]) == [
+            shapes.object_params[3]["seed"],
+            shapes.object_params[0]["seed"],
+        ]
+        assert list(params["image_shape"]) == [28, 28]
+
+
+def test_load_batch_yaml_params(shapes, tmp_path):
+    shapes.save(str(tmp_path))
+    with Load(str(tmp_path)) as dataset:
+        assert dataset.get_params(5)["seed"] == shapes.object_params[5]["seed"]
+
+        _, params = dataset.get_batch([1, 2])
+        assert list(params.keys()) == [1, 2]
@@ -0,0 +1,148 @@
+import pytest
+import numpy as np
+from scipy import ndimage
+
+from deepbench.astro_object import StarObject
+from deepbench.astro_object.psf import (
+    convolve_psf,
+    convolve_varying_psf,
+    psf_kernel,
+    psf_radius,
+    _kernel_rfft,
+)
+
+
+@pytest.fixture()
+def image():
+    return np.random.default_rng(0).uniform(size=(40, 52))
+
+
+def test_default_matches_gaussian_filter(image):
+    expected = ndimage.gaussian_filter(image, sigma=0.7)
+    assert np.allclose(convolve_psf(image), expected)
+    assert np.allclose(convolve_psf(image, method="fft"), expected)
+
+
+@pytest.mark.parametrize(
+    "kernel, kernel_params",
+    [
+        ("gaussian", {"sigma": 2.5}),
+        ("moffat", {"gamma": 2.0, "alpha": 3.0}),
+        ("airy", {"radius": 1.5}),
+    ],
+)
+def test_fft_matches_spatial(image, kernel, kernel_params):
+    spatial = convolve_psf(image, kernel=kernel, **kernel_params)
+    fft = convolve_psf(image, kernel=kernel, method="fft", **kernel_params)
+
+    assert fft.shape == image.shape
+    assert np.allclose(fft, spatial)
+
+
+def test_kernel_normalized():
+    for kernel in ["gaussian", "moffat", "airy"]:
+        kernel_array = psf_kernel(kernel)
+        radius = psf_radius(kernel)
+        assert kernel_array.shape == (2 * radius + 1, 2 * radius + 1)
+        assert np.isclose(kernel_array.sum(), 1)
+        assert np.unravel_index(kernel_array.argmax(), kernel_array.shape) == (
+            radius,
+            radius,
+        )
+
+
+def test_kernel_spectrum_cached(image):
+    convolve_psf(image, kernel="moffat", method="fft", gamma=4.0, alpha=2.0)
+    hits = _kernel_rfft.cache_info().hits
+    convolve_psf(image + 1, kernel="moffat", method="fft", gamma=4.0, alpha=2.0)
+
+    assert _kernel_rfft.cache_info().hits == hits + 1
+
+
+def test_spectrum_cache_bounded_in_bytes():
+    from deepbench.astro_object.psf import _lru_cache_bytes
+
+    @_lru_cache_bytes(20 * 8)
+    def ones(size):
+        return np.ones(size)
+
+    ones(10)
+    ones(10)
+    ones(5)
+    assert ones.cache_info().hits == 1
+    assert ones.cache_info().current_bytes == 15 * 8
+
+    # The least recently used array is dropped to stay within the bound
+    ones(8)
+    assert ones.cache_info().current_bytes == 13 * 8
+    ones(5)
+    assert ones.cache_info().hits == 2
+
+    # Arrays over the bound are not cached
+    ones(30)
+    ones(30)
+    assert ones.cache_info().misses == 5
+
+
+def test_multichannel_image(image):
+    channels = np.stack([image, 2 * image], axis=-1)
+    convolved = convolve_psf(channels, kernel="airy", method="fft")
+
+    assert np.allclose(convolved[..., 0], convolve_psf(image, kernel="airy"))
+    assert np.allclose(convolved[..., 1], 2 * convolved[..., 0])
+
+
+def test_unknown_kernel_and_method(image):
+    with pytest.raises(NotImplementedError):
+        convolve_psf(image, kernel="not a kernel")
+    with pytest.raises(NotImplementedError):
+        convolve_psf(image, method="not a method")
+
+
+def test_object_psf():
+    star = StarObject(image_dimensions=(32, 32), noise_level=0, radius=1.0)
+    star.set_psf("moffat", method="fft", gamma=2.0)
+    fft = star.create_object(center_x=16, center_y=16)
+
+    star.set_psf("moffat", gamma=2.0)
+    spatial = star.create_object(center_x=16, center_y=16)
+
+    assert np.allclose(fft, spatial)
+
+
+def test_uniform_varying_psf_matches_convolution(image):
+    sigma = np.full((3, 4), 1.5)
+    varying = convolve_varying_psf(image, sigma=sigma)
+
+    assert varying.shape == image.shape
+    assert np.allclose(varying, convolve_psf(image, sigma=1.5))
+
+
+def test_varying_psf_at_nodes():
+    # Nodes at rows and columns 0, 20 and 40
+    sigma = np.array([[0.5, 1.0, 1.5], [2.0, 2.5, 3.0], [3.5, 4.0, 4.5]])
+    for row, column in [(1, 1), (0, 2), (2, 1)]:
+        point = np.zeros((41, 41))
+        point[20 * row, 20 * column] = 1.0
+        varying = convolve_varying_psf(point, kernel="gaussian", sigma=sigma)
+
+        expected = convolve_psf(point, sigma=sigma[row, column])
+        assert np.allclose(varying, expected)
+
+
+def test_varying_moffat_mixed_params(image):
+    gamma = [[1.0, 3.0], [2.0, 1.0]]
+    varying = convolve_varying_psf(image, kernel="moffat", gamma=gamma, alpha=3.0)
+
+    assert varying.shape == image.shape
+    assert np.isclose(varying.sum(), image.sum(), rtol=1e-2)
+
+
+def test_varying_psf_spectra_cached(image):
+    sigma = np.linspace(0.5, 2.0, 64).reshape(8, 8)
+    first = convolve_varying_psf(image, sigma=sigma)
+    misses = _kernel_rfft.cache_info().misses
+
+    # Every node kernel of the grid stays cached between calls
+    assert np.array_equal(convolve_varying_psf(image, sigma=sigma), first)
+    assert _kernel_rfft.cache_info().misses == misses
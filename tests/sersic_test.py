@@ -0,0 +1,89 @@
+import pytest
+import numpy as np
+from astropy.modeling.models import Sersic2D
+from scipy.special import gammaincinv
+
+from deepbench.astro_object import GalaxyObject
+from deepbench.astro_object.sersic import sersic_bn, sersic_profile, sersic_batch
+
+
+@pytest.fixture()
+def galaxies():
+    rng = np.random.default_rng(2)
+    n_galaxies = 6
+    return {
+        "center_x": rng.uniform(0, 40, n_galaxies),
+        "center_y": rng.uniform(0, 30, n_galaxies),
+        "amplitude": rng.uniform(0.5, 2, n_galaxies),
+        "r_eff": rng.uniform(2, 10, n_galaxies),
+        "n": np.array([0.5, 1.0, 4.0, 1.0, 2.5, 6.0]),
+        "ellip": rng.uniform(0, 0.8, n_galaxies),
+        "theta": rng.uniform(-1.5, 1.5, n_galaxies),
+    }
+
+
+def astropy_profile(x, y, galaxy):
+    return Sersic2D(
+        amplitude=galaxy["amplitude"],
+        r_eff=galaxy["r_eff"],
+        n=galaxy["n"],
+        x_0=galaxy["center_x"],
+        y_0=galaxy["center_y"],
+        ellip=galaxy["ellip"],
+        theta=galaxy["theta"],
+    )(x, y)
+
+
+def test_bn():
+    assert np.isclose(sersic_bn(4.0), gammaincinv(8.0, 0.5))
+    n = np.array([[1.0, 2.0], [4.0, 1.0]])
+    assert np.allclose(sersic_bn(n), gammaincinv(2 * n, 0.5))
+
+
+def test_profile_matches_astropy(galaxies):
+    x, y = np.meshgrid(np.arange(40), np.arange(30))
+    for index in range(len(galaxies["n"])):
+        galaxy = {name: values[index] for name, values in galaxies.items()}
+        profile = sersic_profile(
+            x,
+            y,
+            amplitude=galaxy["amplitude"],
+            r_eff=galaxy["r_eff"],
+            n=galaxy["n"],
+            x_0=galaxy["center_x"],
+            y_0=galaxy["center_y"],
+            ellip=galaxy["ellip"],
+            theta=galaxy["theta"],
+        )
+        assert np.allclose(profile, astropy_profile(x, y, galaxy), rtol=1e-10)
+
+
+def test_batch_matches_astropy(galaxies):
+    batch = sersic_batch((30, 40), **galaxies)
+    assert batch.shape == (6, 30, 40)
+
+    x, y = np.meshgrid(np.arange(40), np.arange(30))
+    for index, profile in enumerate(batch):
+        galaxy = {name: values[index] for name, values in galaxies.items()}
+        assert np.allclose(profile, astropy_profile(x, y, galaxy), rtol=1e-10)
+
+    buffer = np.zeros((6, 30, 40), dtype=np.float32)
+    assert sersic_batch((30, 40), out=buffer, **galaxies) is buffer
+    assert np.allclose(buffer, batch, rtol=1e-5)
+
+
+def test_galaxy_object_matches_astropy():
+    galaxy = GalaxyObject(
+        image_dimensions=(32, 32),
+        radius=6,
+        n=2.0,
+        ellipse=0.4,
+        theta=0.3,
+        noise_level=0,
+    )
+    x, y = np.meshgrid(np.arange(32), np.arange(32))
+    expected = Sersic2D(
+        amplitude=1, r_eff=6, n=2.0, x_0=12.0, y_0=18.0, ellip=0.4, theta=0.3
+    )(x, y)
+
+    assert np.allclose(galaxy.create_Sersic_profile(12.0, 18.0), expected, rtol=1e-10)
@@ -339,3 +339,21 @@ def test_ellipse_oob_center():
     circle = ShapeGenerator((10, 10)).create_ellipse(center=(100, 100))
     contents = circle.sum().sum()
     assert 0.0 == contents
+
+
+def test_shapes_added_into_out():
+    generator = ShapeGenerator((28, 28))
+    rectangle = generator.create_rectangle(center=(14, 14), width=6, height=8)
+    ellipse = generator.create_ellipse(center=(10, 12), width=10, height=6)
+
+    out = np.zeros((28, 28))
+    assert (
+        generator.create_rectangle(center=(14, 14), width=6, height=8, out=out) is out
+    )
+    generator.create_ellipse(center=(10, 12), width=10, height=6, out=out)
+
+    assert np.array_equal(out, rectangle + ellipse)
+    # Without `out`, each call returns a new image
+    assert (
+        generator.create_rectangle(center=(14, 14), width=6, height=8) is not rectangle
+    )
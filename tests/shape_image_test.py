@@ -1,4 +1,5 @@
 import pytest
+import numpy as np
 from deepbench.image import ShapeImage
 
 
@@ -94,3 +95,67 @@ def test_not_an_astro_object(rectangle):
         shapes_image.combine_objects(
             fake_object, rectangle["instance_params"], rectangle["object_params"]
         )
+
+
+def test_combine_into_buffer():
+    image_shape = (28, 28)
+    shapes_image = ShapeImage(image_shape, object_noise_level=0.1)
+    objects = ["rectangle", "ellipse", "rectangle"]
+    object_params = [
+        {"center": (10, 10), "width": 8, "height": 8, "fill": False},
+        {"center": (14, 14), "width": 12, "height": 8, "fill": True},
+        {"center": (20, 18), "width": 6, "height": 4, "fill": True},
+    ]
+    image = shapes_image.combine_objects(objects, object_params, seed=1)
+
+    buffer = np.full(image_shape, 10.0)
+    out = shapes_image.combine_objects(objects, object_params, seed=1, out=buffer)
+
+    assert out is buffer
+    assert np.allclose(buffer, image)
+
+    separate = sum(
+        shapes_image._create_object(shape, params)
+        for shape, params in zip(objects, object_params)
+    )
+    assert np.allclose(buffer - shapes_image.generate_noise(1), separate)
+
+
+def test_threads_match_serial():
+    image_shape = (28, 28)
+    objects = ["rectangle", "ellipse", "rectangle", "ellipse"]
+    object_params = [
+        {"center": (10, 10), "width": 8, "height": 8, "fill": False},
+        {"center": (14, 14), "width": 12, "height": 8, "fill": True},
+        {"center": (20, 18), "width": 6, "height": 4, "fill": True},
+        {"center": (6, 20), "width": 5, "height": 9, "fill": False},
+    ]
+    serial = ShapeImage(image_shape, object_noise_level=0.1).combine_objects(
+        objects, object_params, seed=1
+    )
+    threaded = ShapeImage(
+        image_shape, object_noise_level=0.1, threads=4
+    ).combine_objects(objects, object_params, seed=1)
+
+    assert np.allclose(threaded, serial)
+
+
+@pytest.mark.parametrize("noise_type", ["gaussian", "poisson"])
+def test_noise_batch(noise_type):
+    shapes_image = ShapeImage(
+        (14, 12), object_noise_level=0.5, object_noise_type=noise_type
+    )
+    seeds = [3, 8, 1]
+
+    batch = shapes_image.generate_noise_batch(seeds)
+    assert batch.shape == (3, 14, 12)
+    for noise, seed in zip(batch, seeds):
+        assert np.array_equal(noise, shapes_image.generate_noise(seed))
+
+    buffer = np.zeros((3, 14, 12), dtype=np.float32)
+    out = shapes_image.generate_noise_batch(seeds, out=buffer)
+    assert out is buffer
+    assert np.array_equal(
+        buffer, shapes_image.generate_noise_batch(seeds, dtype="float32")
+    )
+    assert not np.array_equal(buffer[0], buffer[1])
@@ -1,4 +1,5 @@
 import pytest
+import numpy as np
 from deepbench.image import SkyImage
 
 
@@ -162,3 +163,165 @@ def test_make_the_same_things():
     )
 
     assert (combined_image == generated_combined_image).all()
+
+
+def test_stamp_matches_full_frame():
+    sky_objects = ["star", "galaxy", "star"]
+    sky_params = [
+        {"noise_level": 0, "radius": 1.0, "amplitude": 1.0},
+        {"noise_level": 0, "radius": 3.0, "amplitude": 1.0},
+        {"noise_level": 0, "radius": 2.0, "amplitude": 2.0},
+    ]
+    object_params = [
+        {"center_x": 20, "center_y": 30, "alpha": 2.0},
+        {"center_x": 40, "center_y": 12},
+        {"center_x": 2, "center_y": 60, "alpha": 3.0},
+    ]
+
+    image_shape = (64, 64)
+    full_frame = SkyImage(image_shape).combine_objects(
+        sky_objects, sky_params, object_params
+    )
+    stamps = SkyImage(image_shape, stamp_truncation=1e-4).combine_objects(
+        sky_objects, sky_params, object_params
+    )
+
+    assert stamps.shape == image_shape
+    assert abs(stamps - full_frame).max() < 1e-2
+
+
+def test_stamp_outside_frame(star):
+    image_shape = (14, 14)
+    star["object_params"] = {"center_x": 200, "center_y": 200, "alpha": 5.0}
+    image = SkyImage(image_shape, stamp_truncation=1e-3).combine_objects(**star)
+
+    assert image.shape == image_shape
+    assert image.sum() == 0
+
+
+def test_combine_into_buffer():
+    sky_objects = ["star", "galaxy"]
+    sky_params = [
+        {"noise_level": 0.1, "radius": 1.0, "amplitude": 1.0},
+        {"noise_level": 0.1, "radius": 3.0, "amplitude": 1.0},
+    ]
+    object_params = [
+        {"center_x": 20, "center_y": 30, "alpha": 2.0},
+        {"center_x": 40, "center_y": 12},
+    ]
+    image_shape = (64, 64)
+    sky = SkyImage(image_shape, object_noise_level=0.1)
+    image = sky.combine_objects(sky_objects, sky_params, object_params, seed=3)
+
+    buffer = np.full(image_shape, 10.0)
+    out = sky.combine_objects(
+        sky_objects, sky_params, object_params, seed=3, out=buffer
+    )
+
+    assert out is buffer
+    assert np.allclose(buffer, image)
+
+
+def test_shared_psf_matches_per_object_psf():
+    sky_objects = ["star", "galaxy", "spiral_galaxy"]
+    sky_params = [
+        {"noise_level": 0.2, "radius": 1.0, "amplitude": 1.0},
+        {"noise_level": 0.2, "radius": 3.0, "amplitude": 1.0},
+        {"noise_level": 0.2, "radius": 5.0, "amplitude": 1.0},
+    ]
+    object_params = [
+        {"center_x": 20, "center_y": 30, "alpha": 2.0},
+        {"center_x": 40, "center_y": 12},
+        {"center_x": 32, "center_y": 32},
+    ]
+    image_shape = (64, 64)
+    per_object = SkyImage(image_shape, scale=False).combine_objects(
+        sky_objects, sky_params, object_params, seed=5
+    )
+    shared = SkyImage(image_shape, scale=False, shared_psf=True).combine_objects(
+        sky_objects, sky_params, object_params, seed=5
+    )
+
+    assert np.allclose(shared, per_object)
+
+
+def test_shared_psf_stamps():
+    sky_objects = ["star", "star"]
+    sky_params = [
+        {"noise_level": 0, "radius": 1.0, "amplitude": 1.0},
+        {"noise_level": 0, "radius": 2.0, "amplitude": 2.0},
+    ]
+    object_params = [
+        {"center_x": 20, "center_y": 30, "alpha": 2.0},
+        {"center_x": 2, "center_y": 60, "alpha": 3.0},
+    ]
+    image_shape = (64, 64)
+    per_object = SkyImage(image_shape, scale=False).combine_objects(
+        sky_objects, sky_params, object_params
+    )
+    shared = SkyImage(
+        image_shape, scale=False, shared_psf=True, stamp_truncation=1e-4
+    ).combine_objects(sky_objects, sky_params, object_params)
+
+    assert abs(shared - per_object).max() < 1e-2
+
+
+def test_varying_psf(star):
+    image_shape = (33, 33)
+    star["object_params"] = {"center_x": 32, "center_y": 32, "alpha": 2.0}
+
+    uniform = SkyImage(
+        image_shape, scale=False, shared_psf=True, psf={"sigma": 3.0}
+    ).combine_objects(**star)
+    varying = SkyImage(
+        image_shape,
+        scale=False,
+        shared_psf=True,
+        psf={"sigma": [[0.5, 0.5], [0.5, 3.0]]},
+    ).combine_objects(**star)
+
+    # The star is on the node with the widest PSF
+    assert abs(varying - uniform).max() < 0.1 * uniform.max()
+
+    with pytest.raises(AssertionError):
+        SkyImage(image_shape, psf={"sigma": [[0.5, 0.5], [0.5, 3.0]]})
+
+
+def test_star_field_object():
+    image_shape = (32, 32)
+    image = SkyImage(image_shape).combine_objects(
+        "star_field",
+        {"noise_level": 0, "radius": 1.0},
+        {"center_x": [4.0, 16.0, 30.0], "center_y": [10.0, 16.0, 2.0], "alpha": 2.0},
+    )
+
+    assert image.shape == image_shape
+    assert image.max() == 1
+    assert image[16, 16] > image[0, 31]
+
+
+def test_threads_match_serial():
+    sky_objects = ["star", "galaxy", "star", "spiral_galaxy", "star"]
+    sky_params = [
+        {"noise_level": 0.1, "radius": 1.0, "amplitude": 1.0},
+        {"noise_level": 0.1, "radius": 3.0, "amplitude": 1.0},
+        {"noise_level": 0.1, "radius": 2.0, "amplitude": 2.0},
+        {"noise_level": 0.1, "radius": 5.0, "amplitude": 1.0},
+        {"noise_level": 0.1, "radius": 1.5, "amplitude": 1.0},
+    ]
+    object_params = [
+        {"center_x": 20, "center_y": 30, "alpha": 2.0},
+        {"center_x": 40, "center_y": 12},
+        {"center_x": 2, "center_y": 60, "alpha": 3.0},
+        {"center_x": 32, "center_y": 32},
+        {"center_x": 50, "center_y": 50, "alpha": 1.0},
+    ]
+    image_shape = (64, 64)
+    serial = SkyImage(image_shape, object_noise_level=0.1).combine_objects(
+        sky_objects, sky_params, object_params, seed=4
+    )
+    threaded = SkyImage(image_shape, object_noise_level=0.1, threads=3).combine_objects(
+        sky_objects, sky_params, object_params, seed=4
+    )
+
+    assert np.allclose(threaded, serial)